@@ -1,5 +1,5 @@
+import math
 from collections import OrderedDict
-import numpy as np
 
 
 class Attribute:
@@ -14,9 +14,12 @@ class Attribute:
         # set number of options for this attribute
         self.num_options = len(self.options)
 
+        # lookup table from value to index
+        self.indices = {value: index for index, value in enumerate(self.options)}
+
     def value2index(self, value):
         ''' Convert value to index, e.g. 'blue' to 1. '''
-        return self.options.index(value)
+        return self.indices[value]
 
     def index2value(self, index):
         ''' Convert index to value, e.g. 2 to 'green'. '''
@@ -36,4 +39,4 @@ attributes_dict = dict(
 CARD_ATTRIBUTES = OrderedDict(sorted(attributes_dict.items()))
 NUMBER_OF_OPTIONS_PER_PROPERTY = [
     attribute.num_options for attribute in CARD_ATTRIBUTES.values()]
-NUMBER_OF_PLAYABLE_CARDS = np.prod(NUMBER_OF_OPTIONS_PER_PROPERTY)
+NUMBER_OF_PLAYABLE_CARDS = math.prod(NUMBER_OF_OPTIONS_PER_PROPERTY)
@@ -0,0 +1,178 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from attribute import NUMBER_OF_PLAYABLE_CARDS
+from board import Board, render_boards
+from card import Card, CARDS
+from completion import count_triples
+from deck import Deck
+from finder import find_sets
+from set import Set
+from simulate import play_game
+
+BASELINE_PATH = 'benchmark_baseline.json'
+
+
+def card_construction():
+    ''' Construct every playable card from its number, tuple and keywords. '''
+    for card_number in range(NUMBER_OF_PLAYABLE_CARDS):
+        card = Card().card_number(card_number)
+        Card().card_tuple(card.indices)
+        Card().keywords(**card.values)
+
+
+def single_validation():
+    ''' Validate a single (valid) set. '''
+    Set([CARDS[0], CARDS[1], CARDS[2]]).is_valid()
+
+
+def batch_validation(triples):
+    ''' Validate a batch of random triples of card numbers. '''
+    return lambda: Set.validate_many(triples)
+
+
+def board_sets(cards):
+    ''' Find all sets among a fixed collection of cards as the game does: build a board holding
+    them (filling its set index) and materialise its sets.
+    '''
+    deck = Deck(seed=0, cards=[])
+    return lambda: Board(1, len(cards), deck=deck, cards=cards).sets_on_board
+
+
+def set_finding(cards):
+    ''' Find all sets among a fixed collection of cards with the NumPy batch finder. '''
+    return lambda: find_sets(cards)
+
+
+def deck_draws():
+    ''' Shuffle a deck and draw all of its cards one by one. '''
+    deck = Deck(seed=0)
+    while len(deck) > 0:
+        deck.draw()
+
+
+def board_update():
+    ''' Deal a board and replace three cards until the deck runs out. '''
+    board = Board(seed=0)
+    while len(board.unplayed_cards) >= 3:
+        board.update_board([0, 1, 2], flattened=True)
+
+
+def rendering(boards):
+    ''' Render many large boards into a single string. '''
+    return lambda: render_boards(boards)
+
+
+def set_counting(card_numbers):
+    ''' Count the sets on a full board by pair completion. '''
+    return lambda: count_triples(card_numbers)
+
+
+def full_game():
+    ''' Play a complete game with the first-found policy. '''
+    play_game(seed=0)
+
+
+def benchmarks():
+    ''' All benchmarks by name, as functions without arguments. '''
+    rng = np.random.default_rng(0)
+    triples = np.array([rng.choice(NUMBER_OF_PLAYABLE_CARDS, 3, replace=False) for _ in range(10000)])
+    suite = {
+        'card_construction': card_construction,
+        'single_validation': single_validation,
+        'batch_validation_10000': batch_validation(triples),
+        'deck_draws': deck_draws,
+        'board_update': board_update,
+        'full_game': full_game,
+    }
+    for size in [9, 12, 15, 21, 27, 40, 60, 81]:
+        cards = [CARDS[card_number] for card_number in rng.permutation(NUMBER_OF_PLAYABLE_CARDS)[:size]]
+        suite[f'board_sets_{size}'] = board_sets(cards)
+        suite[f'find_sets_{size}'] = set_finding(cards)
+    suite['render_100_boards_81'] = rendering([Board(9, 9, seed=seed) for seed in range(100)])
+    suite['count_sets_81'] = set_counting(list(range(NUMBER_OF_PLAYABLE_CARDS)))
+    return suite
+
+
+def measure(function, min_time=0.2):
+    ''' Measure a benchmark function.
+
+    Returns:
+        dictionary with operations per second (best of three runs of at least min_time / 3
+        seconds each) and the peak memory allocated during a single call in bytes.
+    '''
+    # calibrate the number of calls per run
+    calls = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 3:
+            break
+        calls *= 2
+
+    # best of three runs
+    best = elapsed
+    for _ in range(2):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, time.perf_counter() - start)
+
+    # memory peak of a single call
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {'ops_per_sec': calls / best, 'peak_memory': peak}
+
+
+def compare(results, baseline, threshold):
+    ''' Return the names of benchmarks that are more than threshold (fraction) slower than baseline. '''
+    return [name for name, result in results.items()
+            if name in baseline and result['ops_per_sec'] < baseline[name]['ops_per_sec'] * (1 - threshold)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark the core hot paths of the game.')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='JSON file with baseline results.')
+    parser.add_argument('--save', action='store_true', help='store the results as the new baseline.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='maximum allowed slowdown as a fraction of the baseline ops/sec.')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum time per benchmark in seconds.')
+    parser.add_argument('--filter', default='', help='only run benchmarks containing this string.')
+    args = parser.parse_args()
+
+    try:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = {}
+
+    results = {}
+    for name, function in benchmarks().items():
+        if args.filter not in name:
+            continue
+        results[name] = measure(function, args.min_time)
+        change = ''
+        if name in baseline:
+            change = f'{results[name]["ops_per_sec"] / baseline[name]["ops_per_sec"] - 1:+.1%}'
+        print(f'{name:<24}{results[name]["ops_per_sec"]:>14.1f} ops/sec'
+              f'{results[name]["peak_memory"] / 1024:>12.1f} KiB peak  {change}')
+
+    if args.save:
+        with open(args.baseline, 'w') as file:
+            json.dump({**baseline, **results}, file, indent=2)
+        print(f'Baseline saved to {args.baseline}.')
+    else:
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f'Regression beyond {args.threshold:.0%}: {", ".join(regressions)}')
+            sys.exit(1)
@@ -1,48 +1,115 @@
-import numpy as np
-from attribute import CARD_ATTRIBUTES, NUMBER_OF_PLAYABLE_CARDS, NUMBER_OF_OPTIONS_PER_PROPERTY
+import struct
 
-from card import Card
+from attribute import CARD_ATTRIBUTES
+from card import CARDS, GLYPHS
+from completion import SetIndex
+from deck import Deck, PythonGenerator
+from hints import card_mask
 from set import Set
+from table import is_set, third_card
+
+
+def flattened_index(x, y, columns):
+    ''' Convert coordinate (e.g. x = 2, y = 1 with 3 columns) to flattened index (e.g. 7); works
+    elementwise on arrays.
+    '''
+    return (x * columns) + y
+
+
+def render(card_numbers, columns):
+    ''' Grid of card representations with columns cards per row, joined in a single pass. '''
+    return ''.join([GLYPHS[card_number] + ('\t\n' if (i + 1) % columns == 0 else '\t')
+                    for i, card_number in enumerate(card_numbers)])
+
+
+def render_boards(boards, columns=None, separator='\n'):
+    ''' Render many boards into a single string, e.g. for a dashboard.
+
+    Args:
+        boards: Board instances, or sequences of card numbers laid out with columns per row
+        columns: number of columns of boards given as card numbers
+        separator: string between boards
+    '''
+    return separator.join([render([card.id for card in board.cards_on_board], board.columns)
+                           if isinstance(board, Board) else render(board, columns) for board in boards])
 
 
 class Board:
-    def __init__(self, rows=3, columns=3):
+    # binary format: version, rows, columns, number of cards on board, number of unplayed cards
+    HEADER = struct.Struct('<BBBBB')
+    # state of the PCG64 random generator (NumPy): state, increment, has_uint32, uinteger
+    RNG_STATE = struct.Struct('<16s16sBI')
+    # full state of the Mersenne Twister random generator (PythonGenerator): state words, position,
+    # whether a next Gaussian is cached, the cached Gaussian
+    PYTHON_RNG_STATE = struct.Struct('<625I?d')
+    # seeded state of a PythonGenerator: words drawn, seed size in bytes, whether a next Gaussian is
+    # cached, the cached Gaussian; followed by the seed
+    SEEDED_RNG_STATE = struct.Struct('<QH?d')
+    # kind of random generator in a snapshot, version 1 snapshots always have PCG64; the full
+    # Mersenne Twister state (2.5 KB) is only stored for generators restored with setstate
+    PCG64, PYTHON, SEEDED = 0, 1, 2
+    VERSION = 3
+
+    def __init__(self, rows=3, columns=3, consistency_check=False, seed=None, deck=None, cards=None, variant=None):
         ''' Board class
         Manages the cards on the board, the unplayed cards, and can retrieve properties such
-        as the number of sets on the board. 
+        as the number of sets on the board. The sets on the board are maintained incrementally;
+        with consistency_check the index is compared against a full recompute after every change.
+        The seed determines the order of the unplayed cards and the board's random generator.
+        A given deck (Deck class) and cards on the board (Card class) are used instead of dealing.
+
+        With a variant (variant.Variant, e.g. five attributes or four options) the board deals
+        from the variant's deck and finds its K-card sets; its cards are VariantCard instances.
+        Glyphs and snapshots are only available for the standard deck (variant None).
         '''
         # set init variables
         self.rows = rows
         self.columns = columns
+        self.consistency_check = consistency_check
 
-        # matrix of card numbers (e.g. 0-80) reshaped (e.g. 3x3x3x3) for conversion between card number and index
-        self.card_matrix = np.arange(NUMBER_OF_PLAYABLE_CARDS).reshape(
-            NUMBER_OF_OPTIONS_PER_PROPERTY)
+        # rules of the game, None for the standard deck (also when given its attributes)
+        if variant is not None and variant.attributes == list(CARD_ATTRIBUTES.values()):
+            variant = None
+        self.variant = variant
+        self.card = CARDS.__getitem__ if variant is None else variant.card
 
-        # list of card numbers (e.g. 0-80) that have not yet been played; values will get removed from this
-        self.unplayed_cards = list(range(NUMBER_OF_PLAYABLE_CARDS))
+        # shuffled deck of card numbers (e.g. 0-80) that have not yet been played, and its random generator
+        if deck is None:
+            deck = Deck(seed) if variant is None else variant.deck(seed)
+        self.unplayed_cards = deck
+        self.rng = self.unplayed_cards.rng
 
         # cards drawn for the rows x columns sized board
-        self.cards_on_board = [self.get_unplayed_card()
-                               for _ in range(self.rows * self.columns)]
+        self.cards_on_board = self.get_unplayed_cards(self.rows * self.columns) if cards is None else list(cards)
+
+        # index of current sets on board; Set instances are materialised when asked for
+        self.set_index = SetIndex(variant=variant)
+        self._sets_on_board = None
 
-        # define current sets on board
-        self.sets_on_board = self.__find_sets()
+        # bitmask of the card numbers on the board
+        self.mask = 0
+        self.__update_sets(removed=[], added=self.cards_on_board)
+
+    @property
+    def sets_on_board(self):
+        ''' Sets on board as Set instances, in board order. '''
+        if self._sets_on_board is None:
+            self._sets_on_board = self.set_index.sets(self.cards_on_board)
+        return self._sets_on_board
 
     def get_unplayed_card(self):
         ''' Retrieve a single unplayed card 
-        Randomly choose card number from unplayed cards, remove, and return corresponding card. 
+        Draw the next card number from the shuffled unplayed cards and return corresponding card. 
 
         Returns: 
             card: instance of Card class
         '''
-        # Choose a card and remove from unplayed cards
-        card_number = np.random.choice(self.unplayed_cards)
-        self.unplayed_cards.remove(card_number)
+        return self.card(self.unplayed_cards.draw())
 
-        # Convert card number to actual card
-        card = Card().card_number(card_number)
-        return card
+    def get_unplayed_cards(self, k):
+        ''' Retrieve k unplayed cards (or all remaining cards if fewer are left) in a single draw. '''
+        card_numbers = self.unplayed_cards.draw_many(min(k, len(self.unplayed_cards)))
+        return [self.card(card_number) for card_number in card_numbers]
 
     def get_cards(self, indices, flattened=False):
         ''' Retrieve cards based on (flattened or unflattened) indices
@@ -56,59 +123,176 @@ class Board:
             x, y) for x, y in indices] if not flattened else indices
         return [self.cards_on_board[index] for index in flattened_indices]
 
-    def update_board(self, indices):
+    def update_board(self, indices, flattened=False):
         ''' Updates board
         Removes given indices from board and replaces with a new unplayed card. 
 
         Args: 
-            indices: list of tuples (e.g. [(2, 1), (1, 0)]) 
+            indices: list of tuples (e.g. [(2, 1), (1, 0)]) or integers (e.g. [3, 7])
+            flattened: bool indicating whether indices are tuples or integers
         '''
-        for x, y in indices:
-            index = self.__get_flattened_index(x, y)
+        flattened_indices = [self.__get_flattened_index(
+            x, y) for x, y in indices] if not flattened else list(indices)
+        removed = [self.cards_on_board[index] for index in flattened_indices]
 
-            if len(self.unplayed_cards) > 0:
-                self.cards_on_board[index] = self.get_unplayed_card()
-            else:
-                del self.cards_on_board[index]
+        # replace cards while there are unplayed cards, otherwise delete them (from the back,
+        # so deleting does not shift the remaining indices)
+        added = self.get_unplayed_cards(len(flattened_indices))
+        for index, card in zip(flattened_indices, added):
+            self.cards_on_board[index] = card
+        for index in sorted(flattened_indices[len(added):], reverse=True):
+            del self.cards_on_board[index]
 
-        self.sets_on_board = self.__find_sets()
+        self.__update_sets(removed, added)
 
     def set_on_board(self, cards):
-        ''' Returns whether a set of cards is on the board. '''
-        for card in cards:
-            if not card in self.cards_on_board:
+        ''' Returns whether a set of cards is on the board: the cards form a set (a lookup in the
+        completion table, or validation by the variant) and are all on the board.
+        '''
+        card_numbers = [card.id for card in cards]
+        if self.variant is not None:
+            if len(set(card_numbers)) != self.variant.set_size or not self.variant.validate([card_numbers])[0]:
                 return False
-        return True
+        elif len(cards) != 3 or not is_set(*card_numbers):
+            return False
+        mask = card_mask(cards)
+        return self.mask & mask == mask
 
     def redraw(self):
-        ''' Redraws all cards on the board - note that the current cards are lost. '''
-        self.cards_on_board = [self.get_unplayed_card()
-                               for _ in range(self.rows * self.columns)]
+        ''' Redraws all cards on the board - note that the current cards are lost. 
+        If fewer unplayed cards are left than fit on the board, all of them are drawn.
+        '''
+        removed = self.cards_on_board
+        self.cards_on_board = self.get_unplayed_cards(self.rows * self.columns)
+        self.__update_sets(removed, self.cards_on_board)
+
+    def __update_sets(self, removed, added):
+        ''' Update the set index for cards removed from and added to the board. '''
+        self.set_index.remove(removed)
+        self.set_index.add(added)
+        self._sets_on_board = None
+        self.mask = self.mask & ~card_mask(removed) | card_mask(added)
+
+        if self.consistency_check:
+            self.check_sets()
+
+    def check_sets(self):
+        ''' Compare the set index against a full recompute, raise AssertionError on mismatch. '''
+        self.set_index.check(self.cards_on_board)
+        if self.mask != card_mask(self.cards_on_board):
+            raise AssertionError('Board mask differs from the cards on the board.')
+        if [set.cards for set in self.sets_on_board] != [set.cards for set in self.__find_sets()]:
+            raise AssertionError('Sets on board differ from a full recompute.')
 
     def __get_flattened_index(self, x, y):
-        ''' Convert coordinate (e.g. x = 2, y = 1) to flattened index (e.g. 7). '''
-        return (x * self.rows) + y
+        ''' Convert coordinate (e.g. x = 2, y = 1) to flattened index (e.g. 7), raising IndexError
+        for a column that is not on the board.
+        '''
+        if not 0 <= y < self.columns:
+            raise IndexError(f'Column {y} is not on a board with {self.columns} columns.')
+        return flattened_index(x, y, self.columns)
 
     def done(self):
         ''' Board is satisfied -- no unplayed cards and no sets left on board. '''
-        return len(self.unplayed_cards) == 0 and len(self.sets_on_board) == 0
+        return len(self.unplayed_cards) == 0 and self.count_sets() == 0
+
+    def count_sets(self):
+        ''' Count sets on board without materialising Set instances. '''
+        return len(self.set_index)
+
+    def has_set(self):
+        ''' Returns whether there is at least one set on the board. '''
+        return len(self.set_index) > 0
 
     def __find_sets(self):
-        ''' Find sets on board. '''
-        found_sets = []
-        for i, card1 in enumerate(self.cards_on_board):
-            for j, card2 in enumerate(self.cards_on_board[i+1:]):
-                for _, card3 in enumerate(self.cards_on_board[j+1:]):
-                    set = Set([card1, card2, card3])
-                    if set.is_valid(verbose=False):
-                        found_sets.append((set))
-        return found_sets
+        ''' Find sets on board through third-card completion (see table) of every pair of cards,
+        each set reported once from its two lowest positions, in board order.
+        '''
+        cards = self.cards_on_board
+        if self.variant is not None:
+            positions = sorted([tuple(row) for row in self.variant.find_sets([card.id for card in cards]).tolist()])
+            return [Set([cards[i] for i in row]) for row in positions]
+        positions = {card.id: i for i, card in enumerate(cards)}
+        sets = []
+        for i, first in enumerate(cards):
+            for j in range(i + 1, len(cards)):
+                k = positions.get(third_card(first.id, cards[j].id), -1)
+                if k > j:
+                    sets.append(Set([first, cards[j], cards[k]]))
+        return sets
+
+    def to_bytes(self):
+        ''' Compact binary snapshot of the board: one byte per card on the board and per unplayed
+        card (in drawing order), followed by the kind and state of the random generator. Standard
+        deck only.
+        '''
+        if self.variant is not None:
+            raise ValueError('Snapshots only support boards of the standard deck.')
+        unplayed_cards = list(self.unplayed_cards)
+        header = self.HEADER.pack(self.VERSION, self.rows, self.columns,
+                                  len(self.cards_on_board), len(unplayed_cards))
+
+        if isinstance(self.rng, PythonGenerator) and self.rng.words is not None:
+            seed = self.rng.seed_value.to_bytes((self.rng.seed_value.bit_length() + 7) // 8, 'little')
+            rng_state = bytes([self.SEEDED]) + self.SEEDED_RNG_STATE.pack(
+                self.rng.words, len(seed), self.rng.gauss_next is not None, self.rng.gauss_next or 0.0) + seed
+        elif isinstance(self.rng, PythonGenerator):
+            _, words, gauss_next = self.rng.getstate()
+            rng_state = bytes([self.PYTHON]) + self.PYTHON_RNG_STATE.pack(
+                *words, gauss_next is not None, gauss_next or 0.0)
+        else:
+            state = self.rng.bit_generator.state
+            rng_state = bytes([self.PCG64]) + self.RNG_STATE.pack(
+                state['state']['state'].to_bytes(16, 'little'), state['state']['inc'].to_bytes(16, 'little'),
+                state['has_uint32'], state['uinteger'])
+        return header + bytes([card.id for card in self.cards_on_board]) + bytes(unplayed_cards) + rng_state
+
+    @classmethod
+    def from_bytes(cls, data, consistency_check=False):
+        ''' Restore a board from a snapshot made by to_bytes. '''
+        version, rows, columns, board_size, deck_size = cls.HEADER.unpack_from(data)
+        assert version in (1, 2, cls.VERSION)
+
+        # cards on the board and unplayed cards
+        offset = cls.HEADER.size
+        cards = [CARDS[card_number] for card_number in data[offset:offset + board_size]]
+        offset += board_size
+        unplayed_cards = list(data[offset:offset + deck_size])
+        offset += deck_size
+
+        # random generator
+        kind = cls.PCG64
+        if version > 1:
+            kind = data[offset]
+            offset += 1
+        if kind == cls.SEEDED:
+            words, seed_size, has_gauss, gauss_next = cls.SEEDED_RNG_STATE.unpack_from(data, offset)
+            offset += cls.SEEDED_RNG_STATE.size
+            seed = int.from_bytes(data[offset:offset + seed_size], 'little')
+            rng = PythonGenerator.restore(seed, words, gauss_next if has_gauss else None)
+        elif kind == cls.PYTHON:
+            *words, has_gauss, gauss_next = cls.PYTHON_RNG_STATE.unpack_from(data, offset)
+            rng = PythonGenerator()
+            rng.setstate((3, tuple(words), gauss_next if has_gauss else None))
+        else:
+            import numpy as np
+
+            state, inc, has_uint32, uinteger = cls.RNG_STATE.unpack_from(data, offset)
+            rng = np.random.default_rng()
+            rng.bit_generator.state = {
+                'bit_generator': 'PCG64',
+                'state': {'state': int.from_bytes(state, 'little'), 'inc': int.from_bytes(inc, 'little')},
+                'has_uint32': has_uint32,
+                'uinteger': uinteger}
+
+        deck = Deck(rng, cards=unplayed_cards)
+        return cls(rows, columns, consistency_check=consistency_check, deck=deck, cards=cards)
 
     def __repr__(self):
-        ''' Representation of the board for printing: self.rows x self.columns grid with card representation. '''
-        card_representation = ''
-        for i, card in enumerate(self.cards_on_board):
-            card_representation += card.get_card() + '\t'
-            if (i+1) % self.columns == 0:
-                card_representation += '\n'
-        return card_representation
+        ''' Representation of the board for printing: self.rows x self.columns grid with card
+        representation (glyphs for the standard deck, card numbers for variants).
+        '''
+        if self.variant is not None:
+            return ''.join([str(card.id) + ('\t\n' if (i + 1) % self.columns == 0 else '\t')
+                            for i, card in enumerate(self.cards_on_board)])
+        return render([card.id for card in self.cards_on_board], self.columns)
@@ -0,0 +1,248 @@
+import itertools
+import json
+import sqlite3
+from functools import lru_cache
+
+import numpy as np
+
+from variant import STANDARD
+
+
+def span(vectors, n_attributes):
+    ''' Row-reduce vectors over the integers mod 3.
+
+    Returns:
+        basis: list of independent vectors spanning the same space
+        pivots: pivot column of every basis vector
+    '''
+    basis, pivots = [], []
+    for vector in vectors:
+        vector = np.array(vector, dtype=np.int64) % 3
+        for row, pivot in zip(basis, pivots):
+            vector = (vector - vector[pivot] * row) % 3
+        nonzero = np.flatnonzero(vector)
+        if len(nonzero) == 0:
+            continue
+        # normalise the pivot to 1 (2 is its own inverse mod 3)
+        vector = (vector * vector[nonzero[0]]) % 3
+        basis.append(vector)
+        pivots.append(nonzero[0])
+    return basis, pivots
+
+
+def point_invariants(points, variant):
+    ''' Invariant of every card under affine maps: the number of sets and the number of
+    parallelograms (a + b = c + d) among the cards that contain it.
+    '''
+    m = len(points)
+    first, second = np.triu_indices(m, k=1)
+    invariants = np.zeros((m, 2), dtype=np.int64)
+
+    # sets: pairs whose third card is among the cards, every set is found from its three pairs
+    numbers = variant.encode(points)
+    completed = np.isin(variant.encode(-(points[first] + points[second]) % 3), numbers)
+    np.add.at(invariants[:, 0], first[completed], 1)
+    np.add.at(invariants[:, 0], second[completed], 1)
+
+    # parallelograms: pairs of pairs with the same sum, each pair is in (pairs with that sum - 1)
+    _, group, sizes = np.unique(variant.encode((points[first] + points[second]) % 3),
+                                return_inverse=True, return_counts=True)
+    np.add.at(invariants[:, 1], first, sizes[group] - 1)
+    np.add.at(invariants[:, 1], second, sizes[group] - 1)
+    return invariants
+
+
+def extension_keys(points, basis, present, variant):
+    ''' Key of extending the partial affine basis by every point, None for points in its hull.
+
+    The basis extended by a point q outside its affine hull spans a larger hull, and the cards in
+    that hull have coordinates relative to the extended basis; the key is which of these
+    coordinates hold a card (occupied first). Affine maps carry it to equivalent boards.
+
+    Returns:
+        list of tuples of bools or None, one per point
+    '''
+    k = len(basis) - 1
+    # coefficients of the extended hull: the new direction first, so the hull of the basis is the
+    # first 3 ** k rows and q itself is row 3 ** k
+    coefficients = np.array(list(itertools.product([0, 1, 2], repeat=k + 1)), dtype=np.int64).reshape(-1, k + 1)
+    origin = points[basis[0]]
+    directions = (points[basis[1:]] - origin) % 3
+    offsets = (points - origin) % 3
+    hulls = origin + coefficients[:, 1:] @ directions + coefficients[None, :, 0, None] * offsets[:, None, :]
+    numbers = variant.encode(hulls % 3)
+    outside = ~(numbers[:, :3 ** k] == numbers[:, 3 ** k, None]).any(axis=-1)
+    empty = ~present[numbers]
+    return [tuple(empty[q].tolist()) if outside[q] else None for q in range(len(points))]
+
+
+def canonical_basis(points, ranks, d, variant):
+    ''' Ordered affine basis (p0, ..., pd) among points with the smallest invariant keys.
+
+    The bases are searched depth first, one point at a time: every partial basis is only extended
+    by the points of the smallest rank and extension key (see extension_keys), and a branch is cut
+    as soon as its keys exceed those of the best basis found so far. The keys of a full basis
+    describe the coordinates of all cards, so two full bases with the same keys differ by an
+    automorphism of the cards. That automorphism maps the branch of the best basis below their
+    deepest common partial basis onto the branch of the other, which therefore has no smaller
+    keys and is cut too. This bounds the search on highly symmetric collections (e.g. maximal
+    caps, or a hyperplane without one card), whose bases would otherwise all tie.
+
+    Returns:
+        list of d + 1 indices into points
+    '''
+    present = np.zeros(variant.size, dtype=bool)
+    present[variant.encode(points)] = True
+    best = {'keys': None, 'basis': None}
+
+    def search(basis, keys):
+        ''' Extend basis; returns the length of the partial basis to go back to when cut. '''
+        if len(basis) == d + 1:
+            if best['keys'] is None or keys < best['keys']:
+                best['keys'], best['basis'] = keys, basis
+                return len(basis)
+            if keys == best['keys']:
+                common = 0
+                while basis[common] == best['basis'][common]:
+                    common += 1
+                return common
+            return len(basis)
+
+        keys_per_point = extension_keys(points, basis, present, variant)
+        extensions = [(ranks[q], key, q) for q, key in enumerate(keys_per_point) if key is not None]
+        smallest = min([extension[:2] for extension in extensions])
+        keys = keys + [smallest]
+        if best['keys'] is not None and keys > best['keys'][:len(keys)]:
+            return len(basis)
+        for rank, key, q in extensions:
+            if (rank, key) == smallest:
+                back = search(basis + [q], keys)
+                if back < len(basis):
+                    return back
+        return len(basis)
+
+    for p0 in np.flatnonzero(ranks == ranks.min()).tolist():
+        search([p0], [])
+    return best['basis']
+
+
+def subspace_form(d, variant=STANDARD):
+    ''' Canonical form of an affine subspace of dimension d: the cards whose coordinates after the
+    first d are 0, as every affine basis of a subspace maps it onto them.
+    '''
+    coordinates = np.zeros((3 ** d, variant.n_attributes), dtype=np.int64)
+    coordinates[:, :d] = np.array(list(itertools.product([0, 1, 2], repeat=d)), dtype=np.int64).reshape(3 ** d, d)
+    return tuple(np.sort(variant.encode(coordinates)).tolist())
+
+
+def canonical_form(card_numbers, variant=STANDARD):
+    ''' Canonical form of a collection of cards under the symmetries of the game.
+
+    Every affine map of the card space (which includes permuting the values of an attribute,
+    permuting attributes and translations) maps sets to sets. Any ordered affine basis
+    (p0, p1, ..., pd) chosen among the cards defines coordinates of all cards relative to it;
+    the canonical form is the sorted tuple of coordinate card numbers relative to the basis with
+    the smallest invariant keys (see canonical_basis), which is the same for all boards that are
+    equivalent under these maps.
+
+    Two kinds of collections are handled directly: full affine subspaces (e.g. all 81 cards),
+    whose form only depends on their dimension, and collections of more than half of the whole
+    space, whose form is the complement of the form of their complement (the same map carries
+    both).
+
+    Args:
+        card_numbers: card numbers of the collection, e.g. the cards on a board
+        variant: variant with three options per attribute
+    Returns:
+        tuple of card numbers, sorted
+    '''
+    assert variant.options == 3
+    numbers = np.unique(np.asarray(card_numbers, dtype=np.int64))
+    if len(numbers) < 2:
+        return tuple([0] * len(numbers))
+    points = variant.decode(numbers)
+    n = variant.n_attributes
+
+    # affine dimension of the cards, and standard vectors extending their directions to the whole space
+    directions, _ = span(points[1:] - points[0], n)
+    d = len(directions)
+    if len(numbers) == 3 ** d:
+        return subspace_form(d, variant)
+    if d == n and 2 * len(numbers) > variant.size:
+        complement = canonical_form(np.setdiff1d(np.arange(variant.size), numbers), variant)
+        return tuple(np.setdiff1d(np.arange(variant.size), complement).tolist())
+    _, pivots = span(directions + list(np.eye(n, dtype=np.int64)), n)
+    extension = np.eye(n, dtype=np.int64)[[pivot for pivot in pivots[d:]]]
+
+    # rank of the invariant of every card
+    _, ranks = np.unique(point_invariants(points, variant), axis=0, return_inverse=True)
+    basis = canonical_basis(points, ranks.reshape(-1), d, variant)
+
+    # basis matrix with the chosen directions and the extension as columns
+    origin = points[basis[0]]
+    matrix = np.concatenate([(points[basis[1:]] - origin) % 3, extension]).T.astype(float)
+
+    # inverse mod 3 is the adjugate times the determinant mod 3 (1 and 2 are their own inverses)
+    determinant = int(np.rint(np.linalg.det(matrix)))
+    adjugate = np.rint(np.linalg.inv(matrix) * determinant).astype(np.int64)
+    inverse = (adjugate * (determinant % 3)) % 3
+
+    # coordinates of all cards relative to the basis
+    coordinates = ((points - origin) % 3) @ inverse.T % 3
+    return tuple(np.sort(variant.encode(coordinates)).tolist())
+
+
+@lru_cache(maxsize=65536)
+def canonical_board(card_numbers):
+    ''' Canonical form of a frozenset of standard card numbers, memoised in memory. '''
+    return canonical_form(sorted(card_numbers))
+
+
+class CanonicalCache:
+    def __init__(self, path='canonical.sqlite'):
+        ''' CanonicalCache class
+        Persistent sqlite cache of results per canonical board (e.g. set counts or solver
+        evaluations), so equivalent boards are only evaluated once across runs and processes.
+        Results must be invariant under the symmetries of the game and JSON-serialisable.
+        '''
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        self.connection.execute(
+            'CREATE TABLE IF NOT EXISTS results (board BLOB, name TEXT, value TEXT, PRIMARY KEY (board, name))')
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(card_numbers):
+        ''' Key of the canonical board of card numbers: one byte per card number. '''
+        return bytes(canonical_board(frozenset([int(card_number) for card_number in card_numbers])))
+
+    def get(self, card_numbers, name, default=None):
+        ''' Cached result name of the board, or default. '''
+        row = self.connection.execute('SELECT value FROM results WHERE board = ? AND name = ?',
+                                      (self.key(card_numbers), name)).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def set(self, card_numbers, name, value):
+        ''' Store result name of the board. '''
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                    (self.key(card_numbers), name, json.dumps(value)))
+
+    def get_or_compute(self, card_numbers, name, function):
+        ''' Cached result name of the board, computing function(canonical card numbers) on a miss. '''
+        key = self.key(card_numbers)
+        row = self.connection.execute('SELECT value FROM results WHERE board = ? AND name = ?', (key, name)).fetchone()
+        if row is not None:
+            self.hits += 1
+            return json.loads(row[0])
+
+        self.misses += 1
+        value = function(list(key))
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, name, json.dumps(value)))
+        return value
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,295 @@
+import argparse
+import json
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from canonical import canonical_form
+from parallel import bounded_map
+from variant import STANDARD, Variant
+
+# size of the largest set-free collections per number of attributes, extended by the search
+KNOWN_MAXIMUM = {0: 1, 1: 2}
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class CapSearch:
+    def __init__(self, n_attributes, maximum_below=None):
+        ''' CapSearch class
+        Branch-and-bound search for set-free collections of cards (cap sets) in the deck with
+        n_attributes attributes of three options.
+
+        Collections are bitsets of card numbers (Python integers). A branch keeps the bitset of
+        candidates: cards after the last chosen card that complete no pair of chosen cards, so
+        adding a chosen card removes the third card of every pair it forms in one mask each.
+        Branches are bounded with the hyperplanes of the card space: the cards with a.x = v
+        (mod 3) for a fixed direction a form a deck with one attribute less, so every one of the
+        three parallel hyperplanes holds at most maximum_below cards of a set-free collection.
+
+        Args:
+            n_attributes: number of attributes
+            maximum_below: size of the largest set-free collection with n_attributes - 1
+                attributes, computed recursively if None
+        '''
+        self.n_attributes = n_attributes
+        self.variant = STANDARD if n_attributes == STANDARD.n_attributes else Variant.generate(n_attributes, 3)
+        self.size = self.variant.size
+        self.maximum_below = maximum_size(n_attributes - 1) if maximum_below is None else maximum_below
+
+        # third card of every pair of cards, and its bit
+        numbers = np.arange(self.size)
+        pairs = np.stack(np.broadcast_arrays(numbers[:, None], numbers[None, :]), axis=-1)
+        self.thirds = self.variant.complete(pairs).tolist()
+        self.third_bits = [[1 << third for third in row] for row in self.thirds]
+
+        # hyperplanes: one direction per pair of opposite normals (first nonzero coordinate 1)
+        points = self.variant.decode(numbers)
+        normals = points[[i for i in range(1, self.size) if points[i][points[i] != 0][0] == 1]]
+        values = points @ normals.T % 3
+        self.hyperplanes = [[3 * direction + int(value) for direction, value in enumerate(row)] for row in values]
+        self.hyperplane_masks = [0] * (3 * len(normals))
+        for card_number, hyperplanes in enumerate(self.hyperplanes):
+            for hyperplane in hyperplanes:
+                self.hyperplane_masks[hyperplane] |= 1 << card_number
+
+        self.nodes = 0
+        self.pruned = 0
+        self.deadline = None
+
+    @lru_cache(maxsize=None)
+    def slice_caps(self, size):
+        ''' Set-free collections of size cards with one attribute less, one per class of collections
+        equivalent under affine maps, grown one card at a time from the classes one card smaller.
+
+        Returns:
+            list of sorted tuples of card numbers, which are also the card numbers of the
+            collections in the hyperplane of cards whose first attribute has index 0
+        '''
+        if size <= 1:
+            return [tuple(range(size))]
+        below = cap_search(self.n_attributes - 1)
+        classes = set()
+        for cap in self.slice_caps(size - 1):
+            forbidden = set(cap)
+            for i, first in enumerate(cap):
+                forbidden.update([below.thirds[first][second] for second in cap[:i]])
+            for card_number in range(below.size):
+                if card_number not in forbidden:
+                    classes.add(canonical_form(cap + (card_number,), below.variant))
+        return sorted(classes)
+
+    def branches(self, target):
+        ''' Independent subproblems of the search for target.
+
+        Every collection has a hyperplane holding the most of its cards, say m, which an affine
+        map of the card space (which maps sets to sets) moves to the cards whose first attribute
+        has index 0, and the collection in that hyperplane to a representative of its class.
+        Every branch fixes m and the representative; the other cards are searched in the other
+        two hyperplanes, and no hyperplane may hold more than m cards.
+
+        Returns:
+            list of (m, representative) tuples, largest m first since large collections tend to
+            fill a hyperplane
+        '''
+        smallest = -(-target // 3)
+        return [(m, cap) for m in range(min(target, self.maximum_below), smallest - 1, -1) for cap in self.slice_caps(m)]
+
+    def start(self, cap):
+        ''' Chosen cards, candidates and hyperplane counts of the branch of a representative. '''
+        chosen = list(cap)
+        # candidates are the cards outside the hyperplane of the representative
+        candidates = (1 << self.size) - (1 << self.size // 3)
+        counts = [0] * len(self.hyperplane_masks)
+        for i, card_number in enumerate(chosen):
+            for other in chosen[:i]:
+                candidates &= ~self.third_bits[card_number][other]
+            for hyperplane in self.hyperplanes[card_number]:
+                counts[hyperplane] += 1
+        return chosen, candidates, counts
+
+    def bound(self, chosen, candidates, counts, maximum):
+        ''' Upper bound on the size of a set-free collection extending chosen with candidates, with
+        at most maximum cards per hyperplane.
+        '''
+        best = len(chosen) + candidates.bit_count()
+        masks = self.hyperplane_masks
+        for hyperplane in range(0, len(masks), 3):
+            total = 0
+            for h in (hyperplane, hyperplane + 1, hyperplane + 2):
+                total += min(maximum, counts[h] + (candidates & masks[h]).bit_count())
+            if total < best:
+                best = total
+        return best
+
+    def search(self, chosen, candidates, counts, target, maximum):
+        ''' Depth-first search for a set-free collection of target cards extending chosen, with
+        cards from candidates in increasing order.
+
+        Returns:
+            list of card numbers, or None if there is no such collection
+        '''
+        self.nodes += 1
+        if len(chosen) >= target:
+            return list(chosen)
+        if self.bound(chosen, candidates, counts, maximum) < target:
+            self.pruned += 1
+            return None
+        if self.deadline is not None and self.nodes % 1024 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout()
+
+        while candidates and len(chosen) + candidates.bit_count() >= target:
+            lowest = candidates & -candidates
+            card_number = lowest.bit_length() - 1
+            candidates ^= lowest
+
+            remaining = candidates
+            third_bits = self.third_bits[card_number]
+            for other in chosen:
+                remaining &= ~third_bits[other]
+            hyperplanes = self.hyperplanes[card_number]
+            for hyperplane in hyperplanes:
+                counts[hyperplane] += 1
+            chosen.append(card_number)
+
+            found = self.search(chosen, remaining, counts, target, maximum)
+
+            chosen.pop()
+            for hyperplane in hyperplanes:
+                counts[hyperplane] -= 1
+            if found is not None:
+                return found
+        return None
+
+    def search_branch(self, target, branch, time_limit=None):
+        ''' Search a branch (see branches), with statistics.
+
+        Returns:
+            dictionary with the collection found (or None), whether the branch timed out, and
+            the number of nodes and pruned nodes
+        '''
+        maximum, cap = branch
+        chosen, candidates, counts = self.start(cap)
+        self.nodes, self.pruned = 0, 0
+        self.deadline = None if time_limit is None else time.perf_counter() + time_limit
+
+        found, timeout = None, False
+        try:
+            found = self.search(chosen, candidates, counts, target, maximum)
+        except SearchTimeout:
+            timeout = True
+        return {'cap': found, 'timeout': timeout, 'nodes': self.nodes, 'pruned': self.pruned}
+
+    def greedy(self, rng, attempts=100):
+        ''' Largest set-free collection out of random greedy attempts, as a lower bound. '''
+        best = []
+        for _ in range(attempts):
+            chosen, candidates = [], (1 << self.size) - 1
+            for card_number in rng.permutation(self.size).tolist():
+                if not candidates >> card_number & 1:
+                    continue
+                for other in chosen:
+                    candidates &= ~self.third_bits[card_number][other]
+                candidates &= ~(1 << card_number)
+                chosen.append(card_number)
+            if len(chosen) > len(best):
+                best = sorted(chosen)
+        return best
+
+
+@lru_cache(maxsize=None)
+def cap_search(n_attributes):
+    ''' CapSearch per number of attributes, shared by all searches in this process. '''
+    return CapSearch(n_attributes)
+
+
+def search_branch(n_attributes, target, branch, time_limit=None):
+    ''' Search a single branch, see CapSearch.search_branch. '''
+    return cap_search(n_attributes).search_branch(target, branch, time_limit)
+
+
+def find_cap(n_attributes, target, workers=1, time_limit=None):
+    ''' Search for a set-free collection of target cards, splitting the search into branches.
+
+    Returns:
+        dictionary with the collection found (or None), whether the search is complete (no
+        branch timed out) and search statistics
+    '''
+    branches = cap_search(n_attributes).branches(target)
+    statistics = {'target': target, 'branches': len(branches), 'nodes': 0, 'pruned': 0, 'timeouts': 0}
+    found = None
+
+    def add(result):
+        statistics['nodes'] += result['nodes']
+        statistics['pruned'] += result['pruned']
+        statistics['timeouts'] += result['timeout']
+        return result['cap']
+
+    start = time.perf_counter()
+    arguments = [(n_attributes, target, branch, time_limit) for branch in branches]
+    for result in bounded_map(search_branch, arguments, workers):
+        found = add(result)
+        if found is not None:
+            break
+
+    statistics['seconds'] = time.perf_counter() - start
+    return {'cap': None if found is None else sorted(found), 'complete': statistics['timeouts'] == 0,
+            'statistics': statistics}
+
+
+def maximum_cap(n_attributes, workers=1, time_limit=None, seed=None):
+    ''' Largest set-free collection with n_attributes attributes.
+
+    Starts from the best of random greedy collections and searches for one card more until a
+    search finds nothing; the result is proven maximal if that search completed.
+
+    Returns:
+        dictionary with the size, the collection (card numbers), whether it is proven maximal
+        and the statistics of every search
+    '''
+    search = cap_search(n_attributes)
+    best = search.greedy(np.random.default_rng(seed))
+    searches = []
+    while True:
+        result = find_cap(n_attributes, len(best) + 1, workers, time_limit)
+        searches.append(result['statistics'])
+        if result['cap'] is None:
+            break
+        best = result['cap']
+
+    assert search.variant.count_sets(best) == 0
+    return {'n_attributes': n_attributes, 'size': len(best), 'cap': best, 'proven': result['complete'],
+            'searches': searches}
+
+
+def maximum_size(n_attributes):
+    ''' Size of the largest set-free collection with n_attributes attributes, searched recursively. '''
+    if n_attributes not in KNOWN_MAXIMUM:
+        result = maximum_cap(n_attributes)
+        assert result['proven']
+        KNOWN_MAXIMUM[n_attributes] = result['size']
+    return KNOWN_MAXIMUM[n_attributes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Search for the largest set-free collections of cards.')
+    parser.add_argument('--attributes', type=int, default=4)
+    parser.add_argument('--target', type=int, default=None,
+                        help='only search for a collection of this size instead of the maximum.')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--time-limit', type=float, default=None, help='seconds per branch of the search.')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--maximum-below', type=int, default=None,
+                        help='known maximum with one attribute less, instead of searching for it.')
+    args = parser.parse_args()
+
+    if args.maximum_below is not None:
+        KNOWN_MAXIMUM[args.attributes - 1] = args.maximum_below
+
+    if args.target is None:
+        print(json.dumps(maximum_cap(args.attributes, args.workers, args.time_limit, args.seed)))
+    else:
+        print(json.dumps(find_cap(args.attributes, args.target, args.workers, args.time_limit)))
@@ -1,15 +1,37 @@
-import numpy as np
-
-from collections import OrderedDict
+from types import MappingProxyType
 
 from attribute import CARD_ATTRIBUTES, NUMBER_OF_PLAYABLE_CARDS, NUMBER_OF_OPTIONS_PER_PROPERTY
 
-CARD_MATRIX = np.arange(NUMBER_OF_PLAYABLE_CARDS).reshape(
-    NUMBER_OF_OPTIONS_PER_PROPERTY)
+
+def __getattr__(name):
+    ''' Build CARD_MATRIX (card numbers reshaped to e.g. 3x3x3x3) with NumPy when first imported. '''
+    if name == 'CARD_MATRIX':
+        import numpy as np
+        global CARD_MATRIX
+        CARD_MATRIX = np.arange(NUMBER_OF_PLAYABLE_CARDS).reshape(NUMBER_OF_OPTIONS_PER_PROPERTY)
+        return CARD_MATRIX
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
+def card_indices(card_number):
+    ''' Indices of a card number, e.g. 74 to (2, 2, 0, 2): its digits with the number of options of
+    every attribute as base, first attribute most significant (like CARD_MATRIX).
+    '''
+    indices = []
+    for num_options in reversed(NUMBER_OF_OPTIONS_PER_PROPERTY):
+        card_number, index = divmod(card_number, num_options)
+        indices.append(index)
+    return tuple(reversed(indices))
 
 
 class Card:
-    ''' Class CARD represents a single card in the game Set. '''
+    ''' Class CARD represents a single card in the game Set.
+
+    Cards are flyweights: every playable card is created once at import in CARDS, and all
+    initialisation methods return that shared, immutable instance (e.g.
+    Card().card_number(74) is Card().card_number(74)).
+    '''
+    __slots__ = ('id', 'indices', 'values', '_matrix')
 
     def keywords(self, **kwargs):
         ''' Initialise class using keyworded arguments, e.g. color='red', shape='square', etc.
@@ -18,12 +40,14 @@ class Card:
         is an option for that card attribute, and additionally checking that all card 
         attributes are specified by the arguments. 
 
-        If the card is valid, a representation of the card is made in three forms: 
-            * values: a sorted dictionary mapping the card attribute (e.g. 'color') 
+        If the card is valid, the card is returned with its representations:
+            * id: the card number (e.g. 0-80)
+            * values: a sorted mapping of the card attribute (e.g. 'color') 
                         to a value (e.g. 'red')
             * indices: a tuple indicating the values (e.g. (1, 0, 2, 2) for three 
                         blue empty circles)
-            * matrix: an 4x4 matrix zeros matrix with one at the index of the card.
+            * matrix: an 3x3x3x3 zeros matrix with one at the index of the card, computed
+                        lazily when first asked for.
         '''
         # assert valid card
         for key, value in kwargs.items():
@@ -32,53 +56,65 @@ class Card:
         for name in CARD_ATTRIBUTES.keys():
             assert name in kwargs.keys()
 
-        # set card representations
-        self.values = OrderedDict(sorted(kwargs.items()))
-        self.indices = self.__get_index_representation()
-        self.matrix = self.__get_matrix_representation()
-        return self
+        # look up card by its indices
+        card_tuple = tuple([attribute.value2index(kwargs[name]) for name, attribute in CARD_ATTRIBUTES.items()])
+        return CARDS_BY_TUPLE[card_tuple]
 
     def card_tuple(self, card_tuple):
         ''' Initialise class using tuple, e.g. (2, 1, 0, 1)
-        Retrieve the matrix and find the values corresponding to the tuple. 
+        Look up the card corresponding to the tuple. 
         '''
         # Check for card validity
-        assert all([card_tuple[i] < NUMBER_OF_OPTIONS_PER_PROPERTY[i]
+        assert len(card_tuple) == len(NUMBER_OF_OPTIONS_PER_PROPERTY)
+        assert all([0 <= card_tuple[i] < NUMBER_OF_OPTIONS_PER_PROPERTY[i]
                     for i in range(len(card_tuple))])
 
-        # Set all representations
-        self.indices = card_tuple
-        self.matrix = self.__get_matrix_representation()
-        self.values = self.__tuple2values(card_tuple)
-
-        return self
+        return CARDS_BY_TUPLE[tuple(card_tuple)]
 
     def card_number(self, card_number):
         ''' Initialise class using card number, e.g. 74 
-        Find the indices by looking up the number in the CARD_MATRIX and use the set_card_tuple classmethod.
+        Look up the card corresponding to the number in CARDS.
         '''
         # Check for card validity
-        assert np.isin(card_number, CARD_MATRIX)
-
-        # Initialise the class using the corresponding tuple.
-        card_array = np.where(CARD_MATRIX == card_number)
-        card_tuple = tuple([value[0] for value in card_array])
-        self.card_tuple(card_tuple)
-
-        return self
-
-    def __get_index_representation(self):
-        ''' Convert every value to its corresponding index and return as tuple. '''
-        return tuple([CARD_ATTRIBUTES[name].value2index(value) for name, value in self.values.items()])
+        assert 0 <= card_number < NUMBER_OF_PLAYABLE_CARDS
+
+        return CARDS[card_number]
+
+    @classmethod
+    def _create(cls, card_number):
+        ''' Create the single instance of a card number, only used to build CARDS. '''
+        card = cls()
+        indices = card_indices(int(card_number))
+        object.__setattr__(card, 'id', int(card_number))
+        object.__setattr__(card, 'indices', indices)
+        object.__setattr__(card, 'values', MappingProxyType(cls.__tuple2values(indices)))
+        object.__setattr__(card, '_matrix', None)
+        return card
+
+    def __setattr__(self, name, value):
+        # shared instances: changing one would change every board and hash set holding it
+        raise AttributeError(f'Card is immutable, cannot set {name!r}.')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'Card is immutable, cannot delete {name!r}.')
+
+    @property
+    def matrix(self):
+        ''' Matrix representation, computed when first asked for. '''
+        if self._matrix is None:
+            object.__setattr__(self, '_matrix', self.__get_matrix_representation())
+        return self._matrix
 
     def __get_matrix_representation(self):
         ''' Create an empty matrix of the correct size and fill the appropriate spot with a 1. '''
+        import numpy as np
+
         # initialise matrix
-        shape = [attribute.num_options for attribute in CARD_ATTRIBUTES.values()]
-        representation = np.zeros(shape)
+        representation = np.zeros(NUMBER_OF_OPTIONS_PER_PROPERTY)
 
-        # fill in card representation based on indices
+        # fill in card representation based on indices; shared instance so make read-only
         representation[self.indices] = 1
+        representation.flags.writeable = False
         return representation
 
     @staticmethod
@@ -95,20 +131,47 @@ class Card:
 
     def get_card(self):
         ''' Return card representation, e.g. g▣▣▣ for three green squares with dots. '''
-        # define properties color, count, and symbol (shape + fill combination)
-        color = self.values['color'][0]
-        count = int(self.values['count'])
-        shapes = {
-            'square': ['▢', '▣', '■'], 
-            'triangle': ['△', '◬', '▲'], 
-            'circle': ['◯', '◉', '●']}
-        fills = ['empty', 'dots', 'filled']
-        symbol = shapes[self.values['shape']][fills.index(self.values['fill'])]
-
-        # combine symbol and properties into representation
-        shape_count_fill = symbol * count + ' ' * (3 - count)
-        representation = color + shape_count_fill
-        return representation
+        return GLYPHS[self.id]
+
+    def __eq__(self, other):
+        return isinstance(other, Card) and self.id == other.id
+
+    def __hash__(self):
+        return self.id
+
+    def __reduce__(self):
+        # unpickle to the shared instance
+        return _card_from_number, (self.id,)
 
     def __repr__(self):
         return self.get_card()
+
+
+def card_glyph(values):
+    ''' Representation of a card from its values, e.g. g▣▣▣ for three green squares with dots. '''
+    # define properties color, count, and symbol (shape + fill combination)
+    color = values['color'][0]
+    count = int(values['count'])
+    shapes = {
+        'square': ['▢', '▣', '■'],
+        'triangle': ['△', '◬', '▲'],
+        'circle': ['◯', '◉', '●']}
+    fills = ['empty', 'dots', 'filled']
+    symbol = shapes[values['shape']][fills.index(values['fill'])]
+
+    # combine symbol and properties into representation
+    shape_count_fill = symbol * count + ' ' * (3 - count)
+    return color + shape_count_fill
+
+
+def _card_from_number(card_number):
+    ''' Return the shared instance of a card number. '''
+    return CARDS[card_number]
+
+
+# Table of all playable cards, indexed by card number and by card tuple
+CARDS = tuple([Card._create(card_number) for card_number in range(NUMBER_OF_PLAYABLE_CARDS)])
+CARDS_BY_TUPLE = {card.indices: card for card in CARDS}
+
+# Representation of every card, indexed by card number
+GLYPHS = tuple([card_glyph(card.values) for card in CARDS])
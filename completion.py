@@ -0,0 +1,124 @@
+import itertools
+
+from set import Set
+from table import ROWS, SETS_PER_CARD, sets_with, third_card
+
+
+def set_triples(card_numbers):
+    ''' Sets among distinct card numbers as sorted tuples of card numbers, in sorted order, through
+    third-card completion: every set is reported from its two lowest cards.
+    '''
+    present = set(card_numbers)
+    numbers = sorted(present)
+    triples = []
+    for i, first in enumerate(numbers):
+        row = ROWS[first]
+        for second in numbers[i + 1:]:
+            third = row[second]
+            if third > second and third in present:
+                triples.append((first, second, third))
+    return triples
+
+
+def count_triples(card_numbers):
+    ''' Count the sets among distinct card numbers (e.g. a board of up to all 81 cards) without
+    materialising Set instances, like set_triples: every set completes exactly three of the pairs
+    of its cards. For Card instances see Board.count_sets and finder.count_sets.
+    '''
+    present = set(card_numbers)
+    numbers = sorted(present)
+    completed = 0
+    for i, first in enumerate(numbers):
+        row = ROWS[first]
+        for second in numbers[i + 1:]:
+            completed += row[second] in present
+    return completed // 3
+
+
+class SetIndex:
+    ''' Incremental index of the sets among a changing collection of cards.
+
+    Sets are stored as sorted tuples of card numbers. Removing cards drops the sets involving
+    them, adding cards only searches the sets involving the new cards: per new card one
+    third-card completion (see table) for every card already present, or on boards with more
+    cards than sets per card a check of the card's sets in the table.
+
+    With a variant (variant.Variant, K-card sets) every new card is completed together with every
+    combination of K - 2 cards already present, in a single Variant.complete call.
+    '''
+
+    def __init__(self, cards=(), variant=None):
+        # present card numbers (e.g. 0-80), and all sets per present card number
+        self.variant = variant
+        self.present = set()
+        self.sets_by_card = {}
+        self.triples = set()
+        self.add(cards)
+
+    def add(self, cards):
+        ''' Add cards (Card class, or VariantCard with a variant) and the sets they complete. '''
+        for card in cards:
+            self.sets_by_card.setdefault(card.id, set())
+            if self.variant is not None:
+                pairs = self.__variant_sets(card.id)
+            elif len(self.present) > SETS_PER_CARD:
+                pairs = [pair for pair in sets_with(card.id) if pair[0] in self.present and pair[1] in self.present]
+            else:
+                pairs = [(other, third_card(card.id, other)) for other in self.present]
+            for *others, completion in pairs:
+                if completion not in self.present:
+                    continue
+                triple = tuple(sorted((card.id, *others, completion)))
+                if triple not in self.triples:
+                    self.triples.add(triple)
+                    for card_number in triple:
+                        self.sets_by_card[card_number].add(triple)
+
+            self.present.add(card.id)
+
+    def __variant_sets(self, card_number):
+        ''' Other cards of the variant sets with card_number among the present cards: combinations
+        of K - 2 present cards and their completion, each set reported once (from its lowest cards).
+        '''
+        import numpy as np
+
+        size = self.variant.set_size
+        combinations = list(itertools.combinations(sorted(self.present), size - 2))
+        if not combinations:
+            return []
+        others = np.array(combinations, dtype=np.int64).reshape(len(combinations), size - 2)
+        cards = np.column_stack([np.full(len(others), card_number), others])
+        completions = self.variant.complete(cards)
+        return [(*row, completion) for row, completion in zip(others.tolist(), completions.tolist())
+                if completion > row[-1]]
+
+    def remove(self, cards):
+        ''' Remove cards (Card class) and the sets involving them. '''
+        for card in cards:
+            self.present.discard(card.id)
+            for triple in self.sets_by_card.pop(card.id, set()):
+                self.triples.discard(triple)
+                for card_number in triple:
+                    if card_number != card.id:
+                        self.sets_by_card[card_number].discard(triple)
+
+    def sets(self, cards):
+        ''' Sets as Set instances in the order of cards (e.g. the cards on the board). '''
+        positions = {card.id: i for i, card in enumerate(cards)}
+        triples = sorted([tuple(sorted([positions[card_number] for card_number in triple]))
+                          for triple in self.triples])
+        return [Set([cards[i] for i in triple]) for triple in triples]
+
+    def check(self, cards):
+        ''' Compare the index against a full recompute over cards, raise AssertionError on mismatch. '''
+        from finder import card_numbers, find_triples
+
+        numbers = card_numbers(cards)
+        found = find_triples(numbers) if self.variant is None else self.variant.find_sets(numbers)
+        expected = {tuple(sorted(numbers[triple].tolist())) for triple in found}
+        if expected != self.triples or self.present != set(numbers.tolist()):
+            raise AssertionError(f'Set index out of sync: {len(self.triples)} sets indexed, '
+                                 f'{len(expected)} sets on {len(cards)} cards.')
+
+    def __len__(self):
+        return len(self.triples)
@@ -0,0 +1,122 @@
+import hashlib
+import numbers
+import os
+import random
+import sys
+
+from attribute import NUMBER_OF_PLAYABLE_CARDS
+
+
+class PythonGenerator(random.Random):
+    ''' random.Random with the methods of numpy.random.Generator that the game uses, so the
+    interactive game can shuffle and sample without importing NumPy.
+
+    The generator keeps its seed (as an integer) and the number of 32-bit words it has drawn, which
+    together determine its state in a few bytes (see restore); words is None after setstate.
+    '''
+
+    def seed(self, a=None, version=2):
+        ''' Seed with None (random), an integer, or str, bytes or bytearray as random.Random does. '''
+        if a is None:
+            a = int.from_bytes(os.urandom(32), 'big')
+        elif isinstance(a, (str, bytes, bytearray)):
+            a = a.encode() if isinstance(a, str) else bytes(a)
+            a = int.from_bytes(a + hashlib.sha512(a).digest(), 'big')
+        elif not isinstance(a, int):
+            raise TypeError('The only supported seed types are: None, int, str, bytes, and bytearray.')
+        self.seed_value = abs(a)
+        self.words = 0
+        super().seed(self.seed_value)
+
+    def random(self):
+        if self.words is not None:
+            self.words += 2
+        return super().random()
+
+    def getrandbits(self, k):
+        if self.words is not None:
+            self.words += (k + 31) // 32
+        return super().getrandbits(k)
+
+    def setstate(self, state):
+        super().setstate(state)
+        self.words = None
+
+    @classmethod
+    def restore(cls, seed_value, words, gauss_next=None):
+        ''' Generator in the state after drawing words 32-bit words from seed_value. '''
+        rng = cls(seed_value)
+        random.Random.getrandbits(rng, 32 * words)
+        rng.words = words
+        rng.gauss_next = gauss_next
+        return rng
+
+    def integers(self, low, high=None):
+        ''' Random integer in [0, low) or, if high is given, in [low, high). '''
+        return self.randrange(low) if high is None else self.randrange(low, high)
+
+    def permutation(self, n):
+        ''' Random permutation of range(n) as a list. '''
+        permutation = list(range(n))
+        self.shuffle(permutation)
+        return permutation
+
+
+def default_rng(seed=None):
+    ''' Random generator for a seed: a NumPy SeedSequence (as used by simulations), Generator or
+    BitGenerator gives a numpy.random.Generator; None and integers of any type (e.g. 3 and
+    numpy.int64(3) deal the same game) give a PythonGenerator.
+    '''
+    if isinstance(seed, PythonGenerator):
+        return seed
+    if isinstance(seed, numbers.Integral):
+        return PythonGenerator(int(seed))
+    # NumPy seeds can only exist once NumPy is imported
+    if 'numpy' in sys.modules:
+        import numpy as np
+        if isinstance(seed, (np.random.SeedSequence, np.random.Generator, np.random.BitGenerator)):
+            return np.random.default_rng(seed)
+    return PythonGenerator(seed)
+
+
+class Deck:
+    def __init__(self, seed=None, size=NUMBER_OF_PLAYABLE_CARDS, cards=None):
+        ''' Deck class
+        Holds the unplayed card numbers (e.g. 0-80), shuffled once with the deck's own random
+        generator and drawn from the front, so every draw is O(1) and a seed reproduces the
+        exact order of draws.
+
+        Args:
+            seed: seed or random generator for the deck's random generator, see default_rng
+            size: number of card numbers in the deck
+            cards: card numbers in drawing order, e.g. to restore a deck; used instead of shuffling
+        '''
+        self.rng = default_rng(seed)
+        self.cards = [int(card_number) for card_number in (self.rng.permutation(size) if cards is None else cards)]
+        self.position = 0
+
+    def draw(self):
+        ''' Draw a single card number. '''
+        if len(self) == 0:
+            raise IndexError('Cannot draw from an empty deck.')
+        card_number = self.cards[self.position]
+        self.position += 1
+        return card_number
+
+    def draw_many(self, k):
+        ''' Draw k card numbers at once, e.g. to deal a board or refill three positions. '''
+        if k > len(self):
+            raise IndexError(f'Cannot draw {k} cards from a deck of {len(self)} cards.')
+        card_numbers = self.cards[self.position:self.position + k]
+        self.position += k
+        return card_numbers
+
+    def __len__(self):
+        return len(self.cards) - self.position
+
+    def __iter__(self):
+        ''' Iterate over the remaining card numbers in drawing order. '''
+        return iter(self.cards[self.position:])
+
+    def __contains__(self, card_number):
+        return card_number in self.cards[self.position:]
@@ -0,0 +1,57 @@
+import numpy as np
+
+from attribute import NUMBER_OF_PLAYABLE_CARDS
+from set import Set
+from table import completion_array
+
+# third card of every pair of card numbers, copied from the memory-mapped table (see table) as indices
+COMPLETIONS = completion_array().astype(np.int64)
+
+
+def card_numbers(cards):
+    ''' Convert cards (Card class) to an array of card numbers (e.g. 0-80). '''
+    return np.array([card.id for card in cards], dtype=np.int64)
+
+
+def third_cards(first, second):
+    ''' Card numbers that complete each pair of card numbers into a set, looked up in the
+    completion table (see table); broadcasts like NumPy arithmetic.
+    '''
+    return COMPLETIONS[np.asarray(first), np.asarray(second)]
+
+
+def find_triples(numbers):
+    ''' Find sets among card numbers based on third-card completion.
+
+    Every pair (i, j) is completed to its unique third card, which is looked up in a position
+    index of the given cards; a set is only reported from its two lowest positions so each set
+    is found once.
+
+    Returns:
+        triples: (n_sets, 3) array of positions (i < j < k) into numbers, sorted lexicographically
+    '''
+    numbers = np.asarray(numbers, dtype=np.int64)
+    first, second = np.triu_indices(len(numbers), k=1)
+
+    # position of every card number on the board, -1 if not present
+    positions = np.full(NUMBER_OF_PLAYABLE_CARDS, -1, dtype=np.int64)
+    positions[numbers] = np.arange(len(numbers))
+
+    third = positions[third_cards(numbers[first], numbers[second])]
+    found = third > second
+    return np.stack([first[found], second[found], third[found]], axis=1)
+
+
+def find_sets(cards):
+    ''' Find sets among cards (Card class), returned as Set instances in board order. '''
+    return [Set([cards[i] for i in triple]) for triple in find_triples(card_numbers(cards))]
+
+
+def count_sets(cards):
+    ''' Count sets among cards without materialising Set instances. '''
+    return len(find_triples(card_numbers(cards)))
+
+
+def has_set(cards):
+    ''' Whether there is at least one set among cards. '''
+    return count_sets(cards) > 0
@@ -0,0 +1,242 @@
+import struct
+import time
+from collections import defaultdict, namedtuple
+
+from board import Board
+from card import CARDS
+from hints import HINTS
+from set import Set
+
+# structured output of the game, e.g. Event('sets', {'count': 2})
+Event = namedtuple('Event', 'kind data')
+Command = namedtuple('Command', 'function help')
+
+
+class GameCore:
+    # binary format: version, exit, seconds played, length of the board snapshot
+    HEADER = struct.Struct('<B?dH')
+    COUNTER = struct.Struct('<BI')
+    VERSION = 1
+
+    def __init__(self, board_shape=(3, 3), seed=None, board=None, replay_log=None, hint_service=HINTS):
+        ''' GameCore class
+        State machine of a single game without any input or output: commands go in through
+        handle and come out as a list of structured events, so any front-end (the terminal in
+        play.py, the server in server.py) can drive the same game rules. A given board is used
+        instead of dealing one, and every handled command is appended to replay_log if given.
+        Hints come from hint_service, by default shared by all games in the process.
+        '''
+        # commands and their help
+        self.commands = {
+            'set': Command(self.enter_set, 'to enter a set.'),
+            'redraw': Command(self.redraw_board, 'redraw the current board.'),
+            'info': Command(self.report_sets, 'report number of available sets.'),
+            'hint': Command(self.report_hint, 'get a hint.'),
+            'status': Command(self.report_status, 'report current game status.'),
+            'quit': Command(self.quit, 'exit the game.')
+        }
+
+        # manage game variables
+        self.board = Board(rows=board_shape[0], columns=board_shape[1], seed=seed) if board is None else board
+        self.exit = False
+        self.replay_log = replay_log
+
+        # player variables
+        self.player_variables = defaultdict(int)
+        self.hints = {'set': [], 'hinted': []}
+        self.hint_service = hint_service
+        self.start_time = time.time()
+
+    def finished(self):
+        ''' Game is finished if the player quit or the board is done. '''
+        return self.exit or self.board.done()
+
+    def start(self):
+        ''' Events introducing the game: the current board and the commands. '''
+        return [self.board_event(), Event('commands', {name: command.help for name, command in self.commands.items()})]
+
+    def handle(self, command, argument=None):
+        ''' Execute a command, e.g. handle('set', '(1, 2), (1, 0), (0, 0)') or handle('hint').
+
+        Returns:
+            list of events (Event namedtuple) resulting from the command
+        '''
+        if self.replay_log is not None:
+            self.replay_log.append(command, argument)
+
+        if command not in self.commands:
+            return [Event('unknown_command', {'command': command})]
+
+        events = self.commands[command].function(argument)
+        if not self.exit and self.board.done():
+            events.append(Event('game_over', self.status()))
+        return events
+
+    def to_bytes(self):
+        ''' Compact binary snapshot of the game: board snapshot (see Board.to_bytes), player
+        counters as (name, uint32) pairs and the hint state as card numbers.
+        '''
+        board = self.board.to_bytes()
+        header = self.HEADER.pack(self.VERSION, self.exit, time.time() - self.start_time, len(board))
+
+        counters = bytes([len(self.player_variables)])
+        for variable, value in self.player_variables.items():
+            name = variable.encode()
+            counters += self.COUNTER.pack(len(name), value) + name
+
+        hints = b''.join([bytes([len(self.hints[key])]) + bytes([card.id for card in self.hints[key]])
+                          for key in ['set', 'hinted']])
+        return header + board + counters + hints
+
+    @classmethod
+    def from_bytes(cls, data, replay_log=None):
+        ''' Restore a game from a snapshot made by to_bytes. '''
+        version, exit, seconds_played, board_size = cls.HEADER.unpack_from(data)
+        assert version == cls.VERSION
+        offset = cls.HEADER.size
+        game = cls(board=Board.from_bytes(data[offset:offset + board_size]), replay_log=replay_log)
+        game.exit = exit
+        game.start_time = time.time() - seconds_played
+        offset += board_size
+
+        # player counters
+        for _ in range(data[offset]):
+            name_size, value = cls.COUNTER.unpack_from(data, offset + 1)
+            offset += cls.COUNTER.size
+            game.player_variables[data[offset + 1:offset + 1 + name_size].decode()] = value
+            offset += name_size
+        offset += 1
+
+        # hint state
+        for key in ['set', 'hinted']:
+            game.hints[key] = [CARDS[card_number] for card_number in data[offset + 1:offset + 1 + data[offset]]]
+            offset += 1 + data[offset]
+        return game
+
+    def board_event(self):
+        ''' Event with the cards on the board. '''
+        return Event('board', {
+            'cards': [card.get_card() for card in self.board.cards_on_board],
+            'card_ids': [card.id for card in self.board.cards_on_board],
+            'columns': self.board.columns})
+
+    def status(self):
+        ''' Current game status - player variables, minutes played and, while playing, unplayed cards. '''
+        status = {
+            'player_variables': dict(self.player_variables),
+            'minutes': int((time.time() - self.start_time) / 60)}
+        if not self.exit:
+            status['unplayed_cards'] = len(self.board.unplayed_cards)
+        return status
+
+    def report_status(self, argument=None):
+        ''' Report status - player variables (hints, valid sets, etc.), time and unplayed cards. '''
+        return [Event('status', self.status())]
+
+    def report_sets(self, argument=None):
+        ''' Report number of available sets on the current board. '''
+        return [Event('sets', {'count': self.board.count_sets()})]
+
+    def report_hint(self, argument=None):
+        ''' Provide the player with a hint.
+
+        A new hint request should be a continuation the previously given hints. E.g. if hint g●●●
+        was sampled from set [b◉◉◉, g●●●, r◯◯◯], the next hint should be b◉◉◉ or r◯◯◯.
+        '''
+        # add hint request to player variables
+        self.player_variables['hints_asked'] += 1
+
+        # no set to hint at, e.g. before a redraw
+        if not self.board.has_set():
+            return [Event('sets', {'count': 0})]
+
+        # New hint set logic: 1) no set yet determined 2) whole set has been hinted 3) set no longer on the board
+        refresh_hints = True if len(self.hints['hinted']) == 3 or len(
+            self.hints['set']) == 0 else False
+        set_on_board = self.board.set_on_board(self.hints['set'])
+        refresh_hint_set = not set_on_board if not refresh_hints else True
+
+        if refresh_hint_set:
+            # randomly choose a set and a hint.
+            hint_sets = self.hint_service.sets(self.board)
+            hint_options = [CARDS[card_number] for card_number in hint_sets[self.board.rng.integers(len(hint_sets))]]
+            hint_chosen = hint_options[self.board.rng.integers(len(hint_options))]
+
+            # save choices for future reference
+            self.hints['set'] = hint_options
+            self.hints['hinted'] = [hint_chosen]
+        else:
+            # choose hint from options (set - already given hints)
+            hint_options = [elem for elem in self.hints['set']
+                            if elem not in self.hints['hinted']]
+            hint_chosen = hint_options[self.board.rng.integers(len(hint_options))]
+
+            # save chosen hint
+            self.hints['hinted'].append(hint_chosen)
+
+        return [Event('hint', {'cards': [card.get_card() for card in self.hints['hinted']]})]
+
+    def quit(self, argument=None):
+        ''' Option to quit the program. Report status before exiting. '''
+        self.exit = True
+        return [Event('status', self.status())]
+
+    def redraw_board(self, argument=None):
+        ''' Redraw the cards on the board. '''
+        self.player_variables['board_redrawn'] += 1
+        self.board.redraw()
+        return [self.board_event()]
+
+    def enter_set(self, argument=None):
+        ''' Player enters a set.
+        The argument is a string of board coordinates in tuple format, e.g. '(1, 2), (1, 0), (0, 0)'.
+        Check validity of the input (e.g. 3 distinct cards, tuples), check validity of the set and
+        update the board and score accordingly.
+        '''
+        # Check input validity.
+        indices = self.parse_indices(argument)
+        if indices is None:
+            return [Event('invalid_input', {'input': argument})]
+
+        self.player_variables['proposed_sets'] += 1
+
+        # Check set validity
+        cards = self.board.get_cards(indices, flattened=False)
+        invalid_attributes = Set(cards).invalid_attributes()
+        valid_set = len(invalid_attributes) == 0
+        events = [Event('set', {
+            'cards': [card.get_card() for card in cards],
+            'valid': valid_set,
+            'invalid_attributes': invalid_attributes})]
+
+        # Update board and score
+        if valid_set:
+            self.player_variables['valid_sets'] += 1
+            self.board.update_board(indices)
+            events.append(self.board_event())
+        return events
+
+    def parse_indices(self, argument):
+        ''' Parse a string of three distinct board coordinates, e.g. '(1, 2), (1, 0), (0, 0)'.
+
+        Returns:
+            list of three (row, column) tuples, or None if the input is invalid
+        '''
+        # imported here since parsing Python literals is only needed once a set is entered
+        import ast
+
+        try:
+            indices = [tuple(elem) for elem in ast.literal_eval(str(argument).strip())]
+        except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+            return None
+
+        # three distinct coordinates of two non-negative integers each, that are on the board
+        if not all([len(elem) == 2 and all([isinstance(i, int) and i >= 0 for i in elem]) for elem in indices]):
+            return None
+        if len(indices) != 3 or len(set(indices)) != 3:
+            return None
+        try:
+            self.board.get_cards(indices, flattened=False)
+        except IndexError:
+            return None
+        return indices
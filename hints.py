@@ -0,0 +1,57 @@
+from collections import OrderedDict
+
+
+def number_mask(card_numbers):
+    ''' Bitmask of card numbers, bit i is set if card number i is present. '''
+    mask = 0
+    for card_number in card_numbers:
+        mask |= 1 << card_number
+    return mask
+
+
+def card_mask(cards):
+    ''' Bitmask of cards (Card class), see number_mask. '''
+    return number_mask([card.id for card in cards])
+
+
+class HintService:
+    def __init__(self, maxsize=4096):
+        ''' HintService class
+        Caches the sets to hint at per board state in a bounded LRU cache, keyed by the bitmask of
+        the card numbers on the board, so boards with the same cards (in any layout, in any game
+        in this process) share the entry. The sets are ordered by card numbers, which fixes the
+        hint ordering independently of the board layout and of cache hits or misses.
+        '''
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def sets(self, board):
+        ''' Sets on the board as sorted tuples of card numbers, in hint order. '''
+        key = board.mask
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        self.misses += 1
+        sets = tuple(sorted(board.set_index.triples))
+        self.cache[key] = sets
+        if len(self.cache) > self.maxsize:
+            self.cache.popitem(last=False)
+        return sets
+
+    def info(self):
+        ''' Cache statistics: hits, misses, maximum and current size. '''
+        return {'hits': self.hits, 'misses': self.misses, 'maxsize': self.maxsize, 'currsize': len(self.cache)}
+
+    def clear(self):
+        ''' Empty the cache and reset the statistics. '''
+        self.cache.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# hint service shared by all games in this process
+HINTS = HintService()
@@ -0,0 +1,184 @@
+import bisect
+import cProfile
+import json
+import pstats
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from board import Board
+from completion import SetIndex
+from deck import Deck
+from game import GameCore
+from hints import HintService
+
+# upper bounds (seconds) of the latency histogram buckets, roughly three per decade
+BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 5e-4, 1e-3, 2.5e-3, 5e-3,
+           1e-2, 2.5e-2, 5e-2, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# internal operations that are timed: (class, attribute, operation name); board.find_sets is the
+# full recompute, which only runs in consistency mode (see Board.check_sets)
+OPERATIONS = [
+    (Board, 'get_unplayed_cards', 'board.deal'),
+    (Board, '_Board__update_sets', 'board.update_sets'),
+    (Board, '_Board__find_sets', 'board.find_sets'),
+    (SetIndex, 'add', 'set_index.add'),
+    (SetIndex, 'remove', 'set_index.remove'),
+    (SetIndex, 'sets', 'set_index.materialise'),
+    (Deck, 'draw', 'deck.draw'),
+    (Deck, 'draw_many', 'deck.draw_many'),
+    (HintService, 'sets', 'hints.sets'),
+]
+
+
+class Histogram:
+    def __init__(self):
+        ''' Histogram class
+        Latency histogram with fixed buckets (see BUCKETS), its count and its sum in seconds.
+        '''
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        ''' Add a single latency. '''
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        ''' Upper bound of the bucket holding quantile q, e.g. quantile(0.99). '''
+        rank, cumulative = q * self.count, 0
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            if cumulative >= rank and cumulative > 0:
+                return bound
+        return 0.0
+
+    def to_dict(self):
+        ''' Summary and cumulative bucket counts as a JSON-serialisable dictionary. '''
+        cumulative, buckets = 0, {}
+        for bound, count in zip(BUCKETS + (float('inf'),), self.counts):
+            cumulative += count
+            buckets['+Inf' if bound == float('inf') else repr(bound)] = cumulative
+        return {'count': self.count, 'sum': self.sum, 'mean': self.sum / max(self.count, 1),
+                'p50': self.quantile(0.5), 'p99': self.quantile(0.99), 'buckets': buckets}
+
+
+class Instrumentation:
+    def __init__(self):
+        ''' Instrumentation class
+        Latency histograms per game command (e.g. 'command.set') and per internal operation
+        (see OPERATIONS). Enabling wraps the timed methods in place and disabling restores the
+        originals, so when off the game runs its own code without any checks.
+        '''
+        self.histograms = {}
+        self.originals = {}
+
+    @property
+    def enabled(self):
+        return len(self.originals) > 0
+
+    def observe(self, name, seconds):
+        ''' Add a latency to the histogram of name. '''
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name):
+        ''' Time a block of code, e.g. with INSTRUMENTATION.timer('simulate.game'): ... '''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start)
+
+    def wrap(self, function, name):
+        ''' Function timed as operation name. '''
+        @wraps(function)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+        return timed
+
+    def wrap_handle(self, handle):
+        ''' GameCore.handle timed per command, e.g. as 'command.set'. '''
+        @wraps(handle)
+        def timed(game, command, argument=None):
+            start = time.perf_counter()
+            try:
+                return handle(game, command, argument)
+            finally:
+                name = f'command.{command}' if command in game.commands else 'command.unknown'
+                self.observe(name, time.perf_counter() - start)
+        return timed
+
+    def enable(self):
+        ''' Start timing commands and internal operations. '''
+        if self.enabled:
+            return
+        self.originals[(GameCore, 'handle')] = GameCore.__dict__['handle']
+        GameCore.handle = self.wrap_handle(GameCore.__dict__['handle'])
+        for owner, attribute, name in OPERATIONS:
+            original = self.originals[(owner, attribute)] = owner.__dict__[attribute]
+            if isinstance(original, classmethod):
+                setattr(owner, attribute, classmethod(self.wrap(original.__func__, name)))
+            else:
+                setattr(owner, attribute, self.wrap(original, name))
+
+    def disable(self):
+        ''' Stop timing, restoring the original methods; recorded histograms are kept. '''
+        for (owner, attribute), original in self.originals.items():
+            setattr(owner, attribute, original)
+        self.originals.clear()
+
+    def reset(self):
+        ''' Remove all recorded histograms. '''
+        self.histograms.clear()
+
+    def to_dict(self):
+        ''' All histograms as a JSON-serialisable dictionary, by name. '''
+        return {name: histogram.to_dict() for name, histogram in sorted(self.histograms.items())}
+
+    def to_prometheus(self):
+        ''' All histograms in the Prometheus text exposition format. '''
+        lines = ['# HELP set_latency_seconds Latency of game commands and internal operations.',
+                 '# TYPE set_latency_seconds histogram']
+        for name, histogram in sorted(self.histograms.items()):
+            for bound, count in histogram.to_dict()['buckets'].items():
+                lines.append(f'set_latency_seconds_bucket{{operation="{name}",le="{bound}"}} {count}')
+            lines.append(f'set_latency_seconds_sum{{operation="{name}"}} {histogram.sum}')
+            lines.append(f'set_latency_seconds_count{{operation="{name}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path):
+        ''' Write all histograms to a local file: Prometheus text for a .prom file, JSON otherwise. '''
+        with open(path, 'w') as file:
+            if path.endswith('.prom'):
+                file.write(self.to_prometheus())
+            else:
+                json.dump(self.to_dict(), file, indent=2)
+
+    @contextmanager
+    def profile(self, path, sort='cumulative'):
+        ''' Capture a cProfile of a block of code (e.g. a single game) into path, readable with
+        pstats, and a text summary sorted by sort into path + '.txt'.
+        '''
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield profiler
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path)
+            with open(path + '.txt', 'w') as file:
+                pstats.Stats(profiler, stream=file).sort_stats(sort).print_stats(50)
+
+
+# instrumentation shared by all games in this process
+INSTRUMENTATION = Instrumentation()
@@ -0,0 +1,81 @@
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict
+
+import numpy as np
+
+from server import GameServer
+
+COMMANDS = ['info', 'hint', 'status', 'redraw', 'set']
+WEIGHTS = [0.2, 0.2, 0.1, 0.1, 0.4]
+
+
+async def play(host, port, commands, board_shape, rng, latencies):
+    ''' Play a single game over a connection with random commands, recording latencies per command. '''
+    reader, writer = await asyncio.open_connection(host, port)
+    await reader.readline()
+
+    for _ in range(commands):
+        command = rng.choice(COMMANDS, p=WEIGHTS)
+        if command == 'set':
+            coordinates = [(int(rng.integers(board_shape[0])), int(rng.integers(board_shape[1]))) for _ in range(3)]
+            command = f'set {", ".join(str(coordinate) for coordinate in coordinates)}'
+
+        start = time.perf_counter()
+        writer.write(f'{command}\n'.encode())
+        await writer.drain()
+        response = await reader.readline()
+        latencies[command.split(' ')[0]].append(time.perf_counter() - start)
+
+        # the server closes the connection when the game is over
+        if not response or json.loads(response)['events'][-1]['kind'] == 'game_over':
+            break
+
+    writer.close()
+
+
+async def run(host, port, games, commands, board_shape, seed, spawn):
+    ''' Run concurrent games against the server, optionally spawning the server in this process. '''
+    server = None
+    if spawn:
+        server = await GameServer(board_shape, seed).serve(host, 0)
+        port = server.sockets[0].getsockname()[1]
+
+    latencies = defaultdict(list)
+    rngs = [np.random.default_rng(seed_sequence) for seed_sequence in np.random.SeedSequence(seed).spawn(games)]
+    start = time.perf_counter()
+    await asyncio.gather(*[play(host, port, commands, board_shape, rng, latencies) for rng in rngs])
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    return latencies, elapsed
+
+
+def report(latencies, elapsed):
+    ''' Report throughput and latency percentiles per command. '''
+    total = sum([len(values) for values in latencies.values()])
+    print(f'{total} commands in {elapsed:.2f} s: {total / elapsed:.0f} commands/sec')
+    print(f'{"command":<10}{"count":>8}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}{"max ms":>10}')
+    for command, values in sorted(latencies.items()):
+        values = np.array(values) * 1000
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        print(f'{command:<10}{len(values):>8}{values.mean():>10.2f}{p50:>10.2f}{p95:>10.2f}{p99:>10.2f}{values.max():>10.2f}')
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate load on a game server with concurrent games.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--games', type=int, default=1000, help='number of concurrent games.')
+    parser.add_argument('--commands', type=int, default=50, help='maximum number of commands per game.')
+    parser.add_argument('--shape', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--spawn', action='store_true', help='run the server in this process.')
+    args = parser.parse_args()
+
+    report(*asyncio.run(run(args.host, args.port, args.games, args.commands, tuple(args.shape),
+                            args.seed, args.spawn)))
@@ -0,0 +1,53 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+
+def seeded_batches(count, batch_size, seed=None):
+    ''' Split count items into batches of at most batch_size, each with an independent child of
+    the SeedSequence of seed, so results only depend on the seed, count and batch size.
+
+    Returns:
+        list of (SeedSequence, batch size) tuples
+    '''
+    batch_sizes = [min(batch_size, count - start) for start in range(0, count, batch_size)]
+    return list(zip(np.random.SeedSequence(seed).spawn(len(batch_sizes)), batch_sizes))
+
+
+def bounded_map(function, arguments, workers=1, ordered=False):
+    ''' Lazily call function with every tuple of arguments, in this process or, with more than
+    one worker, in a ProcessPoolExecutor with at most two calls per worker in flight, so lazy
+    arguments (e.g. chunks of a file) are only read as results are consumed.
+
+    Results are yielded in the order of the arguments if ordered, otherwise as calls finish.
+    Calls that have not started are cancelled when the caller stops early (e.g. with break).
+    '''
+    if workers == 1:
+        for args in arguments:
+            yield function(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+
+        def finished():
+            if ordered:
+                return [pending.popleft()]
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.remove(future)
+            return done
+
+        try:
+            for args in arguments:
+                pending.append(executor.submit(function, *args))
+                if len(pending) >= 2 * workers:
+                    for future in finished():
+                        yield future.result()
+            while pending:
+                for future in finished():
+                    yield future.result()
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,157 @@
+import argparse
+import json
+import struct
+import sys
+
+import numpy as np
+
+from attribute import NUMBER_OF_PLAYABLE_CARDS
+from board import Board
+from card import CARDS
+from deck import Deck
+from parallel import bounded_map, seeded_batches
+from table import ROWS
+
+# completion count of cards on the board during construction
+UNAVAILABLE = NUMBER_OF_PLAYABLE_CARDS ** 3
+
+# binary format: rows, columns, number of sets, followed by one byte per card
+RECORD = struct.Struct('<BBB')
+
+
+class GenerationFailed(Exception):
+    pass
+
+
+def maximum_sets(size):
+    ''' Upper bound on the number of sets among size cards: every card is in at most (size - 1) // 2
+    sets with the others, and every set is counted by its three cards. Exact for 3, 9, 27 and 81
+    cards (lines of a plane, a 3-dimensional space and the whole deck).
+    '''
+    return size * ((size - 1) // 2) // 3
+
+
+def generate_puzzle(size, target_sets, rng, attempts=1000):
+    ''' Generate the card numbers of a board with exactly target_sets sets.
+
+    Cards are added one at a time while tracking for every card not on the board how many pairs
+    on the board it completes, which is the number of sets adding it creates. Every step picks a
+    card that keeps the number of sets within the target, preferring cards that add about the
+    average number of sets still needed per remaining card, and the last card must hit the
+    target exactly. An attempt that gets stuck starts over.
+
+    Args:
+        size: number of cards on the board
+        target_sets: exact number of sets on the board
+        rng: numpy.random.Generator
+        attempts: maximum number of attempts
+    Returns:
+        list of card numbers in random order, or None if no board was found
+    '''
+    for _ in range(attempts):
+        cards = []
+        completions = [0] * NUMBER_OF_PLAYABLE_CARDS
+        sets = 0
+
+        for remaining in range(size, 0, -1):
+            budget = target_sets - sets
+            if remaining == 1:
+                candidates = [card for card, count in enumerate(completions) if count == budget]
+            else:
+                candidates = [card for card, count in enumerate(completions) if count <= budget]
+            if not candidates:
+                break
+
+            # half of the time only consider the cards closest to the average still needed
+            if rng.random() < 0.5:
+                target = budget / remaining
+                distance = min([abs(completions[card] - target) for card in candidates])
+                candidates = [card for card in candidates if abs(completions[card] - target) == distance]
+            card = candidates[int(rng.random() * len(candidates))]
+
+            sets += completions[card]
+            # cards on the board are excluded by a count that exceeds any budget
+            completions[card] = UNAVAILABLE
+            row = ROWS[card]
+            for other in cards:
+                completions[row[other]] += 1
+            cards.append(card)
+        else:
+            rng.shuffle(cards)
+            return cards
+    return None
+
+
+def generate_batch(size, target_sets, seed_sequence, count):
+    ''' Generate a batch of puzzles with the generator of seed_sequence, without those not found. '''
+    rng = np.random.default_rng(seed_sequence)
+    puzzles = [generate_puzzle(size, target_sets, rng) for _ in range(count)]
+    return [puzzle for puzzle in puzzles if puzzle is not None]
+
+
+def generate(count, target_sets, board_shape=(3, 4), seed=None, workers=1, batch_size=1000):
+    ''' Lazily generate puzzles, in batches with independent seeds, optionally across processes.
+
+    Yields:
+        list of card numbers per puzzle
+    Raises:
+        ValueError: if the board does not fit the deck or cannot have target_sets sets
+        GenerationFailed: after the last puzzle, if fewer than count puzzles were found
+    '''
+    size = board_shape[0] * board_shape[1]
+    if not 0 < size <= NUMBER_OF_PLAYABLE_CARDS:
+        raise ValueError(f'A board of {size} cards does not fit a deck of {NUMBER_OF_PLAYABLE_CARDS} cards.')
+    if not 0 <= target_sets <= maximum_sets(size):
+        raise ValueError(f'A board of {size} cards has between 0 and {maximum_sets(size)} sets, not {target_sets}.')
+
+    generated = 0
+    arguments = [(size, target_sets, seed_sequence, batch) for seed_sequence, batch in seeded_batches(count, batch_size, seed)]
+    for puzzles in bounded_map(generate_batch, arguments, workers):
+        generated += len(puzzles)
+        yield from puzzles
+    if generated < count:
+        raise GenerationFailed(f'Generated {generated} of {count} puzzles with {target_sets} sets on {size} cards.')
+
+
+def write_puzzles(file, puzzles, target_sets, board_shape=(3, 4), binary=False):
+    ''' Stream puzzles to a file object: JSON lines, or binary records (see RECORD) if binary. '''
+    written = 0
+    for cards in puzzles:
+        if binary:
+            file.write(RECORD.pack(board_shape[0], board_shape[1], target_sets) + bytes(cards))
+        else:
+            file.write(json.dumps({'rows': board_shape[0], 'columns': board_shape[1],
+                                   'sets': target_sets, 'cards': cards}) + '\n')
+        written += 1
+    return written
+
+
+def puzzle_board(cards, board_shape=(3, 4), seed=None):
+    ''' Board (Board class) with the puzzle cards, and the other cards shuffled as unplayed cards. '''
+    rng = np.random.default_rng(seed)
+    unplayed_cards = rng.permutation(np.setdiff1d(np.arange(NUMBER_OF_PLAYABLE_CARDS), cards))
+    return Board(board_shape[0], board_shape[1], deck=Deck(rng, cards=unplayed_cards),
+                 cards=[CARDS[card_number] for card_number in cards])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate boards with an exact number of sets.')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--sets', type=int, default=0, help='exact number of sets on every board.')
+    parser.add_argument('--shape', type=int, nargs=2, default=(3, 4), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--output', default='-', help='output file, - for standard output.')
+    parser.add_argument('--binary', action='store_true', help='write binary records instead of JSON lines.')
+    args = parser.parse_args()
+
+    puzzles = generate(args.count, args.sets, tuple(args.shape), args.seed, args.workers)
+    try:
+        if args.output == '-':
+            file = sys.stdout.buffer if args.binary else sys.stdout
+            write_puzzles(file, puzzles, args.sets, tuple(args.shape), args.binary)
+        else:
+            with open(args.output, 'wb' if args.binary else 'w') as file:
+                write_puzzles(file, puzzles, args.sets, tuple(args.shape), args.binary)
+    except (ValueError, GenerationFailed) as error:
+        parser.exit(1, f'{parser.prog}: error: {error}\n')
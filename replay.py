@@ -0,0 +1,82 @@
+import struct
+
+from game import GameCore
+
+# record types: snapshot of a game (GameCore.to_bytes) or command with its argument
+SNAPSHOT = b'S'
+COMMAND = b'C'
+RECORD = struct.Struct('<cI')
+
+
+class ReplayLog:
+    def __init__(self, file, game=None, flush=False):
+        ''' ReplayLog class
+        Append-only log of a game in a binary file object. Records are length-prefixed: snapshots
+        (GameCore.to_bytes) and commands as request lines (e.g. b'set (0, 0), (0, 1), (0, 2)').
+        A log starts with a snapshot of the game, further snapshots can be appended as checkpoints.
+
+        Args:
+            file: binary file object opened for writing or appending
+            game: game (GameCore class) to snapshot and log the commands of
+            flush: bool indicating whether to flush the file after every record
+        '''
+        self.file = file
+        self.flush = flush
+        if game is not None:
+            self.snapshot(game)
+            game.replay_log = self
+
+    def write(self, kind, payload):
+        ''' Append a single record. '''
+        self.file.write(RECORD.pack(kind, len(payload)) + payload)
+        if self.flush:
+            self.file.flush()
+
+    def snapshot(self, game):
+        ''' Append a snapshot of the game. '''
+        self.write(SNAPSHOT, game.to_bytes())
+
+    def append(self, command, argument=None):
+        ''' Append a command and its argument. '''
+        line = command if argument is None else f'{command} {argument}'
+        self.write(COMMAND, line.encode())
+
+
+def read_records(file):
+    ''' Lazily read the records of a replay log from a binary file object.
+
+    Yields:
+        (kind, payload) per record, kind is SNAPSHOT or COMMAND
+    '''
+    while True:
+        header = file.read(RECORD.size)
+        if len(header) < RECORD.size:
+            return
+        kind, size = RECORD.unpack(header)
+        yield kind, file.read(size)
+
+
+def replay(file, upto=None):
+    ''' Reconstruct a game from a replay log, streaming its records.
+
+    Every snapshot restores the game directly, later commands are executed on the restored game,
+    which reproduces the original game exactly since the snapshot includes the random generator.
+
+    Args:
+        file: binary file object of the replay log
+        upto: number of commands to replay, or None for the whole log
+    Returns:
+        game (GameCore class) after the given number of commands
+    '''
+    game, commands = None, 0
+    for kind, payload in read_records(file):
+        if kind == SNAPSHOT:
+            game = GameCore.from_bytes(payload)
+            continue
+
+        if upto is not None and commands == upto:
+            break
+        command, _, argument = payload.decode().partition(' ')
+        game.handle(command, argument or None)
+        commands += 1
+    return game
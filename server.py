@@ -0,0 +1,105 @@
+import argparse
+import asyncio
+import json
+
+import numpy as np
+
+from game import Event, GameCore
+
+
+def encode(events):
+    ''' Encode events as a single JSON line, e.g. b'{"events": [{"kind": "sets", "data": {"count": 2}}]}\n'. '''
+    return (json.dumps({'events': [event._asdict() for event in events]}) + '\n').encode()
+
+
+def decode(line):
+    ''' Decode a request line into command and argument, e.g. b'set (0, 0), (0, 1), (0, 2)'. Bytes
+    that are not UTF-8 are replaced, so such lines reach the game as unknown commands or invalid input.
+    '''
+    command, _, argument = line.decode(errors='replace').strip().partition(' ')
+    return command, argument or None
+
+
+async def read_request(reader):
+    ''' Next request line, the partial line at the end of the stream (b'' if none), or None for a
+    line longer than the stream limit, which is discarded through its newline so the next line
+    is the next request.
+    '''
+    try:
+        return await reader.readuntil(b'\n')
+    except asyncio.IncompleteReadError as error:
+        return error.partial
+    except asyncio.LimitOverrunError as error:
+        consumed = error.consumed
+
+    while True:
+        # drop the buffered part of the line, then look for its newline again
+        try:
+            await reader.readexactly(consumed)
+            await reader.readuntil(b'\n')
+            return None
+        except asyncio.IncompleteReadError:
+            return None
+        except asyncio.LimitOverrunError as error:
+            consumed = error.consumed
+
+
+class GameServer:
+    def __init__(self, board_shape=(3, 3), seed=None):
+        ''' GameServer class
+        Hosts one game (GameCore) per TCP connection in a single asyncio event loop, using a line
+        protocol: every request line is a command optionally followed by its argument (e.g.
+        'set (1, 2), (1, 0), (0, 0)' or 'hint'), and every response is one JSON line with the
+        resulting events. The connection is closed when the player quits or the game is over.
+        '''
+        self.board_shape = board_shape
+        self.seed_sequence = np.random.SeedSequence(seed)
+        self.games = 0
+        self.active_games = 0
+
+    async def handle_connection(self, reader, writer):
+        ''' Play a single game over a connection. '''
+        game = GameCore(self.board_shape, seed=self.seed_sequence.spawn(1)[0])
+        self.games += 1
+        self.active_games += 1
+        try:
+            writer.write(encode(game.start()))
+            await writer.drain()
+
+            while not game.finished():
+                line = await read_request(reader)
+                if line is None:
+                    writer.write(encode([Event('invalid_input', {'input': None})]))
+                    await writer.drain()
+                    continue
+                if not line:
+                    break
+                writer.write(encode(game.handle(*decode(line))))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.active_games -= 1
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8765, backlog=4096):
+        ''' Start serving, returns the asyncio server. '''
+        return await asyncio.start_server(self.handle_connection, host, port, backlog=backlog)
+
+
+async def main(host, port, board_shape, seed):
+    server = await GameServer(board_shape, seed).serve(host, port)
+    print(f'Serving games on {", ".join(str(socket.getsockname()) for socket in server.sockets)}')
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve games of Set over a TCP line protocol.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--shape', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.host, args.port, tuple(args.shape), args.seed))
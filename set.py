@@ -1,7 +1,5 @@
-import numpy as np
-
 from attribute import CARD_ATTRIBUTES
-from card import Card
+from table import is_set
 
 
 class Set:
@@ -12,12 +10,21 @@ class Set:
         provided set of cards is a valid set. 
         '''
         self.cards = cards
-        self.set_matrix = self.__get_condensed_matrix(cards)
         self.set_indices = self.__get_condensed_indices(cards)
+        self._set_matrix = None
+
+    @property
+    def set_matrix(self):
+        ''' Condensed matrix representation, computed when first asked for. '''
+        if self._set_matrix is None:
+            self._set_matrix = self.__get_condensed_matrix(self.cards)
+        return self._set_matrix
 
     @staticmethod
     def __get_condensed_matrix(cards):
         ''' Condensed matrix representation - sum of individual card matrices. '''
+        import numpy as np
+
         cards_all_matrices = np.array([card.matrix for card in cards])
         cards_single_matrix = np.sum(cards_all_matrices, axis=0)
         return cards_single_matrix
@@ -47,19 +54,48 @@ class Set:
         unique_attribute_values = len(set(attribute_values))
         return unique_attribute_values == 1 or unique_attribute_values == len(attribute_values)
 
+    @staticmethod
+    def validate_many(sets, return_mask=False):
+        ''' Checks many sets of three cards for validity in a single NumPy pass.
+        Per attribute the values of the three cards must be all the same or all different.
+
+        Args:
+            sets: (N, 3, n_attributes) array of card indices or (N, 3) array of card numbers
+            return_mask: bool indicating whether to also return the per-attribute failure mask
+        Returns:
+            valid: (N,) boolean array indicating which sets are valid
+            invalid_attributes: (N, n_attributes) boolean array, True for attributes that are
+                neither all the same nor all different. Only returned if return_mask.
+        '''
+        from variant import STANDARD
+
+        return STANDARD.validate(sets, return_mask=return_mask)
+
+    def invalid_attributes(self):
+        ''' Names of the attributes that are neither all the same nor all different. '''
+        # cards of a variant (VariantCard class) name the attributes of their variant
+        variant = getattr(self.cards[0], 'variant', None) if self.cards else None
+        if variant is not None:
+            names = [attribute.name for attribute in variant.attributes]
+        # three cards of the standard deck: a single lookup in the completion table
+        elif len(self.cards) == 3 and is_set(*[card.id for card in self.cards]):
+            return []
+        else:
+            names = CARD_ATTRIBUTES.keys()
+        return [name for name, attribute_values in zip(names, self.set_indices)
+                if not self.is_valid_attribute(attribute_values)]
+
     def is_valid(self, verbose=False):
         ''' Checks set for validity - set is valid if all individual attributes are valid. '''
         # determine validity of attributes and set
-        valid_attributes = [self.is_valid_attribute(values) for values in self.set_indices]
-        valid_set = all(valid_attributes)
-        
-        # report invalid attributes if verbose 
-        if verbose and not valid_set: 
-            invalid_attributes_indices = [i for i, attribute in enumerate(valid_attributes) if not attribute]
-            invalid_attributes_names = [list(CARD_ATTRIBUTES.keys())[i] for i in invalid_attributes_indices]
+        invalid_attributes_names = self.invalid_attributes()
+        valid_set = len(invalid_attributes_names) == 0
+
+        # report invalid attributes if verbose
+        if verbose and not valid_set:
             print(f'The following attribute(s) are not compatible: {", ".join(invalid_attributes_names)}')
-            
+
         return valid_set
-        
+
     def __repr__(self):
         return ' '.join([card.get_card() for card in self.cards])
@@ -0,0 +1,213 @@
+import argparse
+import json
+from collections import Counter
+
+from board import Board
+from parallel import bounded_map, seeded_batches
+from solver import Solver
+from variant import Variant
+
+
+def first_set(board, rng):
+    ''' Policy: take the first set found on the board. '''
+    return board.sets_on_board[0]
+
+
+def random_set(board, rng):
+    ''' Policy: take a random set on the board. '''
+    return board.sets_on_board[rng.integers(board.count_sets())]
+
+
+def greedy_set(board, rng):
+    ''' Policy: take the set that leaves the most sets among the remaining cards on the board. '''
+    def remaining_sets(set):
+        card_numbers = {card.id for card in set.cards}
+        return sum([card_numbers.isdisjoint(triple) for triple in board.set_index.triples])
+    return max(board.sets_on_board, key=remaining_sets)
+
+
+class LookaheadPolicy:
+    def __init__(self, rollouts=8):
+        ''' LookaheadPolicy class
+        Policy: take the set with the most expected future sets over a few Monte Carlo rollouts.
+        One solver per game (seeded by the game's rng, so games are reproducible in any process)
+        keeps its transposition table across the decisions of the game.
+        '''
+        self.rollouts = rollouts
+        self.solver = None
+
+    def new_game(self, rng):
+        ''' Start a game: a fresh solver, so games do not depend on the games played before. '''
+        self.solver = Solver(time_budget=None, rollouts=self.rollouts, seed=int(rng.integers(2 ** 63)))
+
+    def __call__(self, board, rng):
+        if board.variant is not None:
+            raise ValueError('The lookahead policy only supports the standard deck.')
+        if self.solver is None:
+            self.new_game(rng)
+        return self.solver.choose(board)
+
+
+POLICIES = {
+    'first': first_set,
+    'random': random_set,
+    'greedy': greedy_set,
+    'lookahead': LookaheadPolicy(),
+}
+
+
+class Statistics:
+    def __init__(self):
+        ''' Statistics class
+        Aggregated results of simulated games; kept as counters so results of any number of
+        games take constant memory and can be merged across processes.
+        '''
+        self.games = 0
+        self.sets_found = 0
+        self.redraws = 0
+        self.board_states = 0
+        self.set_free_boards = 0
+        self.cards_left = 0
+        self.game_lengths = Counter()
+        self.redraws_per_game = Counter()
+
+    def add_game(self, sets_found, redraws, board_states, set_free_boards, cards_left):
+        ''' Add the results of a single game. '''
+        self.games += 1
+        self.sets_found += sets_found
+        self.redraws += redraws
+        self.board_states += board_states
+        self.set_free_boards += set_free_boards
+        self.cards_left += cards_left
+        self.game_lengths[sets_found] += 1
+        self.redraws_per_game[redraws] += 1
+
+    def merge(self, other):
+        ''' Merge statistics of other games into these statistics. '''
+        self.games += other.games
+        self.sets_found += other.sets_found
+        self.redraws += other.redraws
+        self.board_states += other.board_states
+        self.set_free_boards += other.set_free_boards
+        self.cards_left += other.cards_left
+        self.game_lengths.update(other.game_lengths)
+        self.redraws_per_game.update(other.redraws_per_game)
+        return self
+
+    def summary(self):
+        ''' Summary of the statistics as a JSON-serialisable dictionary. '''
+        games = max(self.games, 1)
+        return {
+            'games': self.games,
+            'mean_sets_found': self.sets_found / games,
+            'mean_redraws': self.redraws / games,
+            'mean_cards_left': self.cards_left / games,
+            'set_free_board_frequency': self.set_free_boards / max(self.board_states, 1),
+            'games_with_redraw': 1 - self.redraws_per_game[0] / games,
+            'game_lengths': dict(sorted(self.game_lengths.items())),
+            'redraws_per_game': dict(sorted(self.redraws_per_game.items())),
+        }
+
+
+def play_game(board_shape=(3, 3), policy=first_set, seed=None, variant=None):
+    ''' Play a full game without user input.
+    While the board is not done, the policy takes a set if there is one, otherwise the board
+    is redrawn. With a variant (variant.Variant) the game is played with its deck and sets.
+
+    Returns:
+        dictionary with the number of sets found, redraws, board states seen, set-free board
+        states seen and cards left on the board at the end of the game.
+    '''
+    board = Board(rows=board_shape[0], columns=board_shape[1], seed=seed, variant=variant)
+    # policies with state per game (e.g. LookaheadPolicy) are reset before the first decision
+    new_game = getattr(policy, 'new_game', None)
+    if new_game is not None:
+        new_game(board.rng)
+    sets_found, redraws, board_states, set_free_boards = 0, 0, 0, 0
+
+    while not board.done():
+        board_states += 1
+        if board.has_set():
+            set = policy(board, board.rng)
+            positions = [board.cards_on_board.index(card) for card in set.cards]
+            board.update_board(positions, flattened=True)
+            sets_found += 1
+        else:
+            set_free_boards += 1
+            board.redraw()
+            redraws += 1
+
+    # the final board is set-free by definition of done
+    board_states += 1
+    set_free_boards += 1
+    return dict(sets_found=sets_found, redraws=redraws, board_states=board_states,
+                set_free_boards=set_free_boards, cards_left=len(board.cards_on_board))
+
+
+def simulate_batch(board_shape, policy, seed_sequence, games, variant=None):
+    ''' Play a batch of games, each seeded by its own child of seed_sequence. '''
+    policy = POLICIES.get(policy, policy)
+    statistics = Statistics()
+    for game_seed in seed_sequence.spawn(games):
+        statistics.add_game(**play_game(board_shape, policy, game_seed, variant))
+    return statistics
+
+
+def simulate_iter(games, board_shape=(3, 3), policy='first', seed=None, workers=1, batch_size=1000, variant=None):
+    ''' Simulate games in batches, yielding the aggregated statistics after every finished batch.
+
+    Every batch gets an independent child of the SeedSequence of seed, so the final statistics
+    only depend on the seed, games and batch size, not on the number of workers. With more than
+    one worker the batches run in a ProcessPoolExecutor with a bounded number in flight.
+
+    Args:
+        games: number of games to simulate
+        board_shape: (rows, columns) of the boards
+        policy: name in POLICIES or a picklable callable (board, rng) -> Set, optionally with a
+            new_game(rng) method called at the start of every game
+        seed: seed for the SeedSequence all games are derived from
+        workers: number of processes
+        batch_size: number of games per batch
+        variant: picklable variant.Variant of the games, None for the standard deck
+    '''
+    statistics = Statistics()
+    arguments = [(board_shape, policy, seed_sequence, size, variant)
+                 for seed_sequence, size in seeded_batches(games, batch_size, seed)]
+    for batch_statistics in bounded_map(simulate_batch, arguments, workers):
+        yield statistics.merge(batch_statistics)
+
+
+def simulate(games, board_shape=(3, 3), policy='first', seed=None, workers=1, batch_size=1000, variant=None):
+    ''' Simulate games and return the aggregated statistics, see simulate_iter. '''
+    statistics = Statistics()
+    for statistics in simulate_iter(games, board_shape, policy, seed, workers, batch_size, variant):
+        pass
+    return statistics
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Simulate games of Set without user input.')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--shape', type=int, nargs=2, default=(3, 3), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--policy', choices=POLICIES.keys(), default='first')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--progress', action='store_true', help='print statistics after every batch.')
+    parser.add_argument('--attributes', type=int, default=None, help='number of attributes of a variant (default 4).')
+    parser.add_argument('--options', type=int, default=None,
+                        help='options per attribute and cards per set of a variant (default 3).')
+    args = parser.parse_args()
+
+    variant = None
+    if args.attributes is not None or args.options is not None:
+        variant = Variant.generate(args.attributes or 4, args.options or 3)
+        if args.policy == 'lookahead':
+            parser.error('the lookahead policy only supports the standard deck.')
+
+    statistics = Statistics()
+    for statistics in simulate_iter(args.games, tuple(args.shape), args.policy, args.seed,
+                                    args.workers, args.batch_size, variant):
+        if args.progress:
+            print(json.dumps({'games': statistics.games, 'mean_sets_found': statistics.sets_found / statistics.games}))
+    print(json.dumps(statistics.summary(), indent=2))
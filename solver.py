@@ -0,0 +1,190 @@
+import argparse
+import json
+import random
+import time
+from collections import Counter, OrderedDict
+
+from board import Board
+from completion import set_triples
+from hints import number_mask
+from set import Set
+
+
+class Solver:
+    def __init__(self, time_budget=0.05, rollouts=None, maxsize=1 << 16, shuffle=True, redraw_weight=0.0,
+                 seed=None):
+        ''' Solver class
+        Chooses the set to take from a board by estimating the future sets of every choice with
+        Monte Carlo rollouts: after taking the set the game is played to the end with random sets,
+        drawing from the remaining deck in a random order (or in its actual order if not shuffle,
+        e.g. for offline analysis of a known deal).
+
+        Results are kept in a transposition table keyed by the cards left on the board after
+        taking a set and the cards left in the deck (as bitmasks), which is bounded by maxsize
+        entries in LRU order. Every rollout updates the estimates of all states it passes through,
+        so later decisions in the same game, and equivalent positions in other games, start from
+        the samples of earlier calls.
+
+        Args:
+            time_budget: seconds per decision, or None to only use the number of rollouts
+            rollouts: minimum number of rollouts per candidate set (1 if None)
+            maxsize: maximum number of states in the transposition table
+            shuffle: bool indicating whether rollouts shuffle the remaining deck
+            redraw_weight: penalty per redraw in the score of a rollout, in sets
+            seed: seed of the random generator of the rollouts
+        '''
+        self.time_budget = time_budget
+        self.rollouts = rollouts
+        self.maxsize = maxsize
+        self.shuffle = shuffle
+        self.redraw_weight = redraw_weight
+        self.random = random.Random(seed)
+        # state key -> [total score, number of rollouts]
+        self.table = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def entry(self, key):
+        ''' Entry of a state in the transposition table, created if it does not exist. '''
+        entry = self.table.get(key)
+        if entry is not None:
+            self.table.move_to_end(key)
+            return entry
+        entry = self.table[key] = [0.0, 0]
+        if len(self.table) > self.maxsize:
+            self.table.popitem(last=False)
+        return entry
+
+    def rollout(self, cards, deck, size):
+        ''' Play a game to the end with random sets from the board cards and deck (card numbers, in
+        drawing order).
+
+        Every state after taking a set is recorded with the score obtained from it onwards.
+
+        Returns:
+            score of the rollout: sets found minus redraw_weight per redraw
+        '''
+        cards, deck = list(cards), list(deck)
+        board_mask, deck_mask = number_mask(cards), number_mask(deck)
+
+        score, visited = 0.0, []
+        while True:
+            triples = set_triples(cards)
+            if triples:
+                triple = triples[self.random.randrange(len(triples))]
+                for card in triple:
+                    cards.remove(card)
+                    board_mask &= ~(1 << card)
+                score += 1
+                visited.append(((board_mask, deck_mask), score))
+
+                drawn, deck = deck[:3], deck[3:]
+                cards.extend(drawn)
+                board_mask |= number_mask(drawn)
+                deck_mask &= ~number_mask(drawn)
+            elif deck:
+                score -= self.redraw_weight
+                cards, deck = deck[:size], deck[size:]
+                board_mask = number_mask(cards)
+                deck_mask &= ~board_mask
+            else:
+                break
+
+        for key, reached in visited:
+            entry = self.entry(key)
+            entry[0] += score - reached
+            entry[1] += 1
+        return score
+
+    def evaluate(self, board, time_budget=None):
+        ''' Estimate the expected score of taking each set on the board.
+
+        Candidates are sampled round-robin, most sets left on the board first, until every
+        candidate has the minimum number of rollouts or, with a time budget, until it is spent:
+        the deadline is checked before every rollout, so candidates may have no rollouts at all.
+        Samples already in the transposition table count too.
+
+        Returns:
+            list of (sorted tuple of card numbers, expected score, number of rollouts): candidates
+            with rollouts best first, then those without (expected score None) by sets left
+        '''
+        time_budget = self.time_budget if time_budget is None else time_budget
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        cards = [card.id for card in board.cards_on_board]
+        deck = list(board.unplayed_cards)
+        deck_mask = number_mask(deck)
+        size = board.rows * board.columns
+
+        # state after taking a candidate set: its cards leave the board before the draw
+        triples = sorted(board.set_index.triples)
+        # sets left after taking a triple: two cards share at most one set, so the sets meeting the
+        # triple are those of its three cards less the triple itself counted twice too many
+        per_card = Counter(card for triple in triples for card in triple)
+        sets_left = {triple: len(triples) + 2 - sum([per_card[card] for card in triple]) for triple in triples}
+        candidates = {}
+        for triple in sorted(triples, key=lambda triple: -sets_left[triple]):
+            key = (board.mask & ~number_mask(triple), deck_mask)
+            if key in self.table:
+                self.hits += 1
+            else:
+                self.misses += 1
+            candidates[triple] = key
+
+        minimum = self.rollouts or 1
+        expired = False
+        while candidates and not expired:
+            counts = [self.entry(key)[1] for key in candidates.values()]
+            if min(counts) >= minimum and deadline is None:
+                break
+            for triple, key in candidates.items():
+                if deadline is not None and time.perf_counter() >= deadline:
+                    expired = True
+                    break
+                remaining = [card for card in cards if card not in triple]
+                drawn = deck if not self.shuffle else self.random.sample(deck, len(deck))
+                score = self.rollout(remaining + drawn[:3], drawn[3:], size)
+                entry = self.entry(key)
+                entry[0] += score
+                entry[1] += 1
+
+        results = []
+        for triple, key in candidates.items():
+            total, count = self.entry(key)
+            results.append((triple, 1 + total / count if count else None, count))
+        return sorted(results, key=lambda result: (0, -result[1]) if result[2] else (1, -sets_left[result[0]]))
+
+    def choose(self, board, time_budget=None):
+        ''' Set (Set class) with the highest expected score, in board order, or None if there is no set. '''
+        results = self.evaluate(board, time_budget)
+        if not results:
+            return None
+        triple = set(results[0][0])
+        return Set([card for card in board.cards_on_board if card.id in triple])
+
+    def info(self):
+        ''' Transposition table statistics: hits, misses, maximum and current size. '''
+        return {'hits': self.hits, 'misses': self.misses, 'maxsize': self.maxsize, 'currsize': len(self.table)}
+
+    def clear(self):
+        ''' Empty the transposition table and reset the statistics. '''
+        self.table.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Evaluate the sets on a board with Monte Carlo rollouts.')
+    parser.add_argument('--shape', type=int, nargs=2, default=(3, 4), metavar=('ROWS', 'COLUMNS'))
+    parser.add_argument('--seed', type=int, default=None, help='seed of the deal.')
+    parser.add_argument('--budget', type=float, default=1.0, help='seconds to spend on the evaluation.')
+    parser.add_argument('--known-order', action='store_true', help='roll out with the actual order of the deck.')
+    parser.add_argument('--redraw-weight', type=float, default=0.0)
+    args = parser.parse_args()
+
+    board = Board(args.shape[0], args.shape[1], seed=args.seed)
+    solver = Solver(args.budget, shuffle=not args.known_order, redraw_weight=args.redraw_weight, seed=args.seed)
+    print(board)
+    for triple, score, count in solver.evaluate(board):
+        print(json.dumps({'set': triple, 'expected_score': None if score is None else round(score, 3),
+                          'rollouts': count}))
+    print(json.dumps(solver.info()))
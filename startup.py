@@ -0,0 +1,39 @@
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# run in a fresh interpreter: time the imports of the interactive game and dealing its first board
+PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+from game import GameCore
+imported = time.perf_counter()
+game = GameCore(board_shape=(3, 3), seed=0)
+str(game.board)
+dealt = time.perf_counter()
+print(json.dumps({'import': imported - start, 'first_board': dealt - imported,
+                  'numpy_loaded': 'numpy' in sys.modules}))
+'''
+
+
+def measure(runs=20):
+    ''' Median import and first-board latency (seconds) of the game over fresh interpreters, and
+    whether NumPy was loaded.
+    '''
+    probes = [json.loads(subprocess.run([sys.executable, '-c', PROBE], capture_output=True,
+                                        text=True, check=True).stdout) for _ in range(runs)]
+    return {
+        'import_ms': 1000 * statistics.median([probe['import'] for probe in probes]),
+        'first_board_ms': 1000 * statistics.median([probe['first_board'] for probe in probes]),
+        'numpy_loaded': any([probe['numpy_loaded'] for probe in probes]),
+        'runs': runs,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Measure the startup latency of the interactive game.')
+    parser.add_argument('--runs', type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.runs), indent=2))
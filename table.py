@@ -0,0 +1,126 @@
+import mmap
+import os
+import struct
+import tempfile
+import zlib
+
+from attribute import NUMBER_OF_OPTIONS_PER_PROPERTY, NUMBER_OF_PLAYABLE_CARDS
+from card import card_indices
+
+# binary format: magic, version, number of cards, number of sets per card, CRC-32 of the payload
+HEADER = struct.Struct('<4sBBBI')
+MAGIC = b'SETT'
+VERSION = 2
+
+# every card forms a set with each of the other cards, completed by a third: (81 - 1) / 2 sets
+SETS_PER_CARD = (NUMBER_OF_PLAYABLE_CARDS - 1) // 2
+
+# the table follows the header: the third card of every pair of card numbers (one byte per pair,
+# row-major), then per card number the other two card numbers of each of its sets (sorted)
+COMPLETION_OFFSET = HEADER.size
+SETS_OFFSET = COMPLETION_OFFSET + NUMBER_OF_PLAYABLE_CARDS ** 2
+SIZE = SETS_OFFSET + NUMBER_OF_PLAYABLE_CARDS * SETS_PER_CARD * 2
+
+# cache file of the table, created on first import
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'set_table.bin')
+
+
+def build():
+    ''' Table of the standard deck in the binary format (see SIZE), computed per attribute: the
+    completing value v makes the three values all the same or all different, which for three
+    options is the value with (a + b + v) % 3 == 0.
+    '''
+    indices = [card_indices(card_number) for card_number in range(NUMBER_OF_PLAYABLE_CARDS)]
+    completion = bytearray()
+    for first in indices:
+        for second in indices:
+            third = 0
+            for a, b, options in zip(first, second, NUMBER_OF_OPTIONS_PER_PROPERTY):
+                third = third * options + (-(a + b)) % options
+            completion.append(third)
+
+    sets = bytearray()
+    for card_number in range(NUMBER_OF_PLAYABLE_CARDS):
+        row = completion[card_number * NUMBER_OF_PLAYABLE_CARDS:(card_number + 1) * NUMBER_OF_PLAYABLE_CARDS]
+        for other, third in enumerate(row):
+            if card_number != other and other < third:
+                sets += bytes((other, third))
+    payload = bytes(completion + sets)
+    return HEADER.pack(MAGIC, VERSION, NUMBER_OF_PLAYABLE_CARDS, SETS_PER_CARD, zlib.crc32(payload)) + payload
+
+
+def write(path=TABLE_PATH):
+    ''' Build the table into path, atomically so concurrent processes never read a partial file. '''
+    data = build()
+    directory = os.path.dirname(path) or '.'
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix='.set_table.')
+    try:
+        with os.fdopen(descriptor, 'wb') as file:
+            file.write(data)
+        os.chmod(temporary, 0o644)
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+    return data
+
+
+def load(path=TABLE_PATH):
+    ''' Memory-map the cached table, (re)building the cache file if it is missing, stale or corrupt
+    (its payload does not match the checksum in its header). If the file cannot be written (e.g.
+    a read-only install) the table is kept in memory instead.
+
+    Returns:
+        read-only buffer in the binary format (mmap or bytes)
+    '''
+    expected = (MAGIC, VERSION, NUMBER_OF_PLAYABLE_CARDS, SETS_PER_CARD)
+    for _ in range(2):
+        try:
+            with open(path, 'rb') as file:
+                if os.fstat(file.fileno()).st_size == SIZE:
+                    table = mmap.mmap(file.fileno(), SIZE, access=mmap.ACCESS_READ)
+                    *header, checksum = HEADER.unpack_from(table)
+                    if tuple(header) == expected and zlib.crc32(table[HEADER.size:]) == checksum:
+                        return table
+                    table.close()
+        except OSError:
+            pass
+        try:
+            write(path)
+        except OSError:
+            return build()
+    return build()
+
+
+# table of the standard deck, shared by all games in this process
+TABLE = load()
+
+# row of the completion table per card number, copied once from the table as bytes, which index
+# faster than the mapping, e.g. ROWS[0][1] == 2
+ROWS = [TABLE[start:start + NUMBER_OF_PLAYABLE_CARDS] for start in
+        range(COMPLETION_OFFSET, SETS_OFFSET, NUMBER_OF_PLAYABLE_CARDS)]
+
+
+def third_card(first, second):
+    ''' Card number that completes two card numbers into a set, e.g. third_card(0, 1) == 2. '''
+    return ROWS[first][second]
+
+
+def is_set(first, second, third):
+    ''' Whether three card numbers form a set. '''
+    return ROWS[first][second] == third
+
+
+def sets_with(card_number):
+    ''' The other two card numbers of every set with card_number, as SETS_PER_CARD sorted pairs. '''
+    start = SETS_OFFSET + card_number * SETS_PER_CARD * 2
+    row = TABLE[start:start + SETS_PER_CARD * 2]
+    return list(zip(row[::2], row[1::2]))
+
+
+def completion_array():
+    ''' (81, 81) NumPy array of third cards, a read-only view of the table without copying. '''
+    import numpy as np
+
+    return np.frombuffer(TABLE, dtype=np.uint8, count=NUMBER_OF_PLAYABLE_CARDS ** 2,
+                         offset=COMPLETION_OFFSET).reshape(NUMBER_OF_PLAYABLE_CARDS, NUMBER_OF_PLAYABLE_CARDS)
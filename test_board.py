@@ -0,0 +1,62 @@
+import random
+
+import pytest
+
+from board import Board
+from variant import Variant
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_consistency_fuzz(seed):
+    ''' Drive a board in consistency mode, which compares the set index against a full recompute
+    after every change, through random updates, redraws and deletions at the end of the deck.
+    '''
+    rng = random.Random(seed)
+    rows, columns = rng.choice([(3, 3), (3, 4), (4, 4), (3, 7), (9, 9)])
+    board = Board(rows, columns, consistency_check=True, seed=seed)
+
+    deleted = 0
+    while len(board.cards_on_board) >= 3:
+        operation = rng.random()
+        if operation < 0.05 and len(board.unplayed_cards) >= rows * columns:
+            board.redraw()
+            continue
+        if operation < 0.6 and board.sets_on_board:
+            cards = rng.choice(board.sets_on_board).cards
+            indices = [board.cards_on_board.index(card) for card in cards]
+        else:
+            indices = rng.sample(range(len(board.cards_on_board)), 3)
+
+        size, unplayed = len(board.cards_on_board), len(board.unplayed_cards)
+        if rng.random() < 0.5 and size == rows * columns:
+            board.update_board([divmod(index, columns) for index in indices])
+        else:
+            board.update_board(indices, flattened=True)
+        # cards are replaced while the deck lasts, the others are deleted
+        assert len(board.cards_on_board) == size - max(0, 3 - unplayed)
+        deleted += size - len(board.cards_on_board)
+
+    # the deck ran out, so cards were deleted from the board instead of replaced
+    assert len(board.unplayed_cards) == 0
+    assert deleted > 0
+    board.check_sets()
+
+
+@pytest.mark.parametrize('attributes, options, shape', [(5, 3, (3, 4)), (4, 4, (4, 4)), (3, 5, (4, 5))])
+def test_variant_game(attributes, options, shape):
+    ''' Play a variant to the end in consistency mode, taking random sets of K cards. '''
+    variant = Variant.generate(attributes, options)
+    board = Board(*shape, consistency_check=True, seed=0, variant=variant)
+    rng = random.Random(0)
+    sets_found = 0
+    while not board.done():
+        if board.has_set():
+            cards = rng.choice(board.sets_on_board).cards
+            assert len(cards) == options and board.set_on_board(cards)
+            board.update_board([board.cards_on_board.index(card) for card in cards], flattened=True)
+            sets_found += 1
+        else:
+            board.redraw()
+    assert sets_found > 0
+    assert len(board.unplayed_cards) == 0
+    assert all(card.id < variant.size for card in board.cards_on_board)
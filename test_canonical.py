@@ -0,0 +1,39 @@
+import time
+
+import numpy as np
+import pytest
+
+from canonical import canonical_form
+from variant import STANDARD
+
+# the maximal cap of 20 cards, and a hyperplane of 27 cards without one card
+CAP = [0, 1, 3, 4, 9, 10, 14, 17, 23, 27, 28, 30, 31, 38, 47, 48, 49, 53, 65, 77]
+HYPERPLANE = [card_number for card_number in range(81) if card_number % 3 == 0][1:]
+
+
+def affine_image(card_numbers, rng):
+    ''' Card numbers after a random invertible affine map of the card space. '''
+    while True:
+        matrix = rng.integers(0, 3, (4, 4))
+        if round(np.linalg.det(matrix)) % 3:
+            break
+    points = STANDARD.decode(card_numbers)
+    return STANDARD.encode((points @ matrix.T + rng.integers(0, 3, 4)) % 3).tolist()
+
+
+@pytest.mark.parametrize('cards', [CAP, HYPERPLANE, CAP[:-1], list(range(26))], ids=['cap', 'hyper-1', 'cap-1', 'slice-1'])
+def test_symmetric_boards(cards):
+    start = time.perf_counter()
+    form = canonical_form(cards)
+    assert time.perf_counter() - start < 1
+
+    rng = np.random.default_rng(0)
+    for _ in range(5):
+        assert canonical_form(affine_image(cards, rng)) == form
+
+
+def test_equivalent_boards():
+    rng = np.random.default_rng(1)
+    for size in [4, 6, 9, 12, 20, 30, 45, 70]:
+        cards = rng.choice(81, size, replace=False).tolist()
+        assert canonical_form(affine_image(cards, rng)) == canonical_form(cards)
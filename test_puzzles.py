@@ -0,0 +1,23 @@
+import pytest
+
+from completion import count_triples
+from puzzles import GenerationFailed, generate, maximum_sets
+
+
+def test_exact_number_of_sets():
+    puzzles = list(generate(20, 3, (3, 4), seed=0, batch_size=7))
+    assert len(puzzles) == 20
+    assert all(len(set(cards)) == 12 and count_triples(cards) == 3 for cards in puzzles)
+
+
+def test_impossible_targets():
+    assert maximum_sets(9) == 12 and maximum_sets(81) == 1080
+    for target_sets, board_shape in [(21, (3, 4)), (-1, (3, 4)), (0, (9, 10))]:
+        with pytest.raises(ValueError):
+            next(generate(1, target_sets, board_shape))
+
+
+def test_shortfall_is_reported():
+    ''' 12 cards have at most 20 sets by the bound, but no board with 20 sets exists. '''
+    with pytest.raises(GenerationFailed):
+        list(generate(2, 20, (3, 4), seed=0))
@@ -0,0 +1,24 @@
+import asyncio
+import json
+
+from server import GameServer
+
+
+async def exchange(requests, responses):
+    ''' Send request bytes to a fresh server and read its first responses (after the start). '''
+    server = await GameServer(seed=0).serve(port=0)
+    reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1], limit=1 << 20)
+    await reader.readline()
+    writer.write(requests)
+    await writer.drain()
+    kinds = [json.loads(await reader.readline())['events'][0]['kind'] for _ in range(responses)]
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return kinds
+
+
+def test_one_response_per_request():
+    requests = b'\xff\xfe info\n' + b'set ' + b'x' * 300000 + b'\ninfo\n' + b'y' * 70000 + b'\ninfo\n'
+    kinds = asyncio.run(exchange(requests, 5))
+    assert kinds == ['unknown_command', 'invalid_input', 'sets', 'invalid_input', 'sets']
@@ -0,0 +1,135 @@
+import io
+
+import numpy as np
+import pytest
+
+from board import Board
+from deck import PythonGenerator
+from game import GameCore
+from replay import ReplayLog, replay
+
+SEEDS = {
+    'integer': lambda: 3,
+    'none': lambda: None,
+    'seed_sequence': lambda: np.random.SeedSequence(1),
+}
+
+
+def board_state(board):
+    ''' Everything a snapshot restores, and the next draws of the random generator. '''
+    return (board.rows, board.columns, [card.id for card in board.cards_on_board], list(board.unplayed_cards),
+            sorted(board.set_index.triples), [int(board.rng.integers(1000)) for _ in range(5)])
+
+
+def advance(board):
+    ''' Change the board and the state of its random generator. '''
+    board.update_board([0, 1, 2], flattened=True)
+    board.rng.integers(10)
+    board.redraw()
+    board.update_board([(1, 0), (2, 2), (0, 1)])
+
+
+def play(game):
+    ''' Handle a few commands, including a set found on the board; returns their events. '''
+    events = [game.handle('hint'), game.handle('info'), game.handle('hint')]
+    if game.board.sets_on_board:
+        cards = game.board.sets_on_board[0].cards
+        indices = [divmod(game.board.cards_on_board.index(card), game.board.columns) for card in cards]
+        events.append(game.handle('set', ', '.join([str(index) for index in indices])))
+    events.append(game.handle('hint'))
+    return events
+
+
+def game_state(game):
+    ''' Everything a game snapshot restores except the time played. '''
+    return (game.board.to_bytes(), dict(game.player_variables), [card.id for card in game.hints['set']],
+            [card.id for card in game.hints['hinted']], game.exit)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_board_round_trip(seed):
+    board = Board(3, 4, seed=SEEDS[seed]())
+    advance(board)
+    restored = Board.from_bytes(board.to_bytes())
+    assert type(restored.rng) is type(board.rng)
+    assert restored.to_bytes() == board.to_bytes()
+
+    # the restored board continues exactly like the original
+    advance(board)
+    advance(restored)
+    assert board_state(restored) == board_state(board)
+
+
+def test_integer_seed_snapshot_is_compact():
+    assert len(GameCore(seed=0).to_bytes()) < 160
+    assert len(Board(seed=2 ** 64).to_bytes()) < 160
+
+
+def test_full_python_state():
+    ''' Generators restored with setstate have no seed, so the full Mersenne Twister state is stored. '''
+    rng = PythonGenerator()
+    rng.setstate(PythonGenerator(5).getstate())
+    board = Board(seed=rng)
+    restored = Board.from_bytes(board.to_bytes())
+    assert len(board.to_bytes()) > Board.PYTHON_RNG_STATE.size
+    assert board_state(restored) == board_state(board)
+
+
+def test_version_1_snapshot():
+    ''' Version 1 snapshots have no generator kind and always a PCG64 state. '''
+    board = Board(3, 3, seed=np.random.SeedSequence(7))
+    advance(board)
+    data = board.to_bytes()
+    kind = Board.HEADER.size + len(board.cards_on_board) + len(board.unplayed_cards)
+    assert data[kind] == Board.PCG64
+    restored = Board.from_bytes(bytes([1]) + data[1:kind] + data[kind + 1:])
+    assert board_state(restored) == board_state(board)
+
+
+def test_version_2_snapshot():
+    ''' Version 2 snapshots store the full Mersenne Twister state for Python generators. '''
+    board = Board(3, 3, seed=11)
+    advance(board)
+    _, words, gauss_next = board.rng.getstate()
+    data = board.to_bytes()
+    kind = Board.HEADER.size + len(board.cards_on_board) + len(board.unplayed_cards)
+    legacy = (bytes([2]) + data[1:kind] + bytes([Board.PYTHON])
+              + Board.PYTHON_RNG_STATE.pack(*words, gauss_next is not None, gauss_next or 0.0))
+    assert board_state(Board.from_bytes(legacy)) == board_state(board)
+
+
+@pytest.mark.parametrize('seed', SEEDS)
+def test_game_round_trip(seed):
+    game = GameCore((3, 4), seed=SEEDS[seed]())
+    play(game)
+    restored = GameCore.from_bytes(game.to_bytes())
+    assert restored.player_variables == game.player_variables
+    assert restored.hints == game.hints
+    assert restored.exit == game.exit
+    assert play(restored) == play(game)
+    assert board_state(restored.board) == board_state(game.board)
+
+
+def test_replay_across_checkpoints():
+    game = GameCore((3, 4), seed=21)
+    log = io.BytesIO()
+    ReplayLog(log, game)
+
+    # state after every number of commands, with a checkpoint snapshot after every fourth command
+    states = [game_state(game)]
+    for command in range(24):
+        if command % 3 == 2 and game.board.sets_on_board:
+            cards = game.board.sets_on_board[0].cards
+            indices = [divmod(game.board.cards_on_board.index(card), game.board.columns) for card in cards]
+            game.handle('set', ', '.join([str(index) for index in indices]))
+        else:
+            game.handle(['hint', 'info', 'redraw'][command % 3])
+        states.append(game_state(game))
+        if command % 4 == 3:
+            game.replay_log.snapshot(game)
+
+    for upto in range(len(states)):
+        log.seek(0)
+        assert game_state(replay(log, upto=upto)) == states[upto]
+    log.seek(0)
+    assert game_state(replay(log)) == states[-1]
@@ -0,0 +1,24 @@
+import time
+
+from board import Board
+from solver import Solver
+
+
+def test_time_budget_is_a_bound():
+    ''' On a full 9 x 9 board (1080 sets) not every candidate gets a rollout within the budget. '''
+    board = Board(9, 9, seed=1)
+    start = time.perf_counter()
+    results = Solver(time_budget=0.02, seed=0).evaluate(board)
+    assert time.perf_counter() - start < 0.5
+    assert len(results) == 1080
+    counts = [count for _, _, count in results]
+    assert counts[-1] == 0 and all(score is None for _, score, count in results if not count)
+    # candidates with rollouts come first
+    assert counts == sorted(counts, key=lambda count: count == 0)
+
+
+def test_rollouts_without_budget():
+    results = Solver(time_budget=None, rollouts=3, seed=0).evaluate(Board(3, 4, seed=5))
+    assert all(count >= 3 for _, _, count in results)
+    scores = [score for _, score, _ in results]
+    assert scores == sorted(scores, reverse=True)
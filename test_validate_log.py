@@ -0,0 +1,43 @@
+import io
+import json
+
+from board import Board
+from validate_log import MOVE, encode_move, validate_log
+
+# a valid set on a 1 x 3 board: card numbers 0, 1 and 2
+SET_MOVE = [[0, 0], [0, 1], [0, 2]]
+
+
+def jsonl(board, player='alice', move=SET_MOVE):
+    return json.dumps({'player': player, 'rows': 1, 'columns': 3, 'board': board, 'move': move}) + '\n'
+
+
+def binary(board, player=1, move=SET_MOVE):
+    return MOVE.pack(player, 1, 3, len(board)) + bytes(board) + bytes([i for index in move for i in index])
+
+
+def verdicts(log, binary=False):
+    output = io.StringIO()
+    validate_log(io.BytesIO(log), output, binary=binary, batch_size=3)
+    return [json.loads(line)['verdict'] for line in output.getvalue().splitlines()]
+
+
+def test_jsonl_boards():
+    log = ''.join([jsonl([0, 1, 2]), jsonl([81, 1, 2]), jsonl([-81, 1, 2]), jsonl([1, 1, 1]), jsonl('abc'),
+                   jsonl([0, 1, 2.0]), jsonl([0, 1, True]), jsonl([0, 1, 10 ** 30]), jsonl([0, 1, 3])])
+    assert verdicts(log.encode()) == ['valid'] + ['invalid_input'] * 7 + ['invalid_set']
+
+
+def test_binary_boards():
+    log = b''.join([binary([0, 1, 2]), binary([81, 1, 2]), binary([1, 1, 1]), binary([2, 1, 2]), binary([0, 1, 3])])
+    assert verdicts(log, binary=True) == ['valid', 'invalid_input', 'invalid_input', 'invalid_input', 'invalid_set']
+
+
+def test_formats_agree_with_the_game():
+    board = Board(3, 4, seed=0)
+    moves = [[(0, 0), (0, 1), (0, 2)], [(0, 0), (0, 0), (1, 1)], [(2, 3), (0, 4), (1, 0)]]
+    moves += [[tuple(divmod(board.cards_on_board.index(card), 4)) for card in board.sets_on_board[0].cards]]
+    text = ''.join([encode_move(board, move, 7) for move in moves]).encode()
+    records = b''.join([encode_move(board, move, 7, binary=True) for move in moves])
+    assert verdicts(text) == verdicts(records, binary=True)
+    assert verdicts(text)[-1] == 'valid'
@@ -0,0 +1,233 @@
+import argparse
+import json
+import struct
+import sys
+from collections import Counter, defaultdict, namedtuple
+
+import numpy as np
+
+from attribute import NUMBER_OF_PLAYABLE_CARDS
+from board import flattened_index
+from parallel import bounded_map
+from variant import STANDARD
+
+# binary move record: player, rows, columns, number of cards on the board, followed by one byte per
+# card on the board and one byte per coordinate of the three proposed positions
+MOVE = struct.Struct('<HBBB')
+
+# verdict codes
+VERDICTS = ('valid', 'invalid_set', 'invalid_input')
+VALID, INVALID_SET, INVALID_INPUT = range(len(VERDICTS))
+
+# coordinates of a move that could not be parsed
+INVALID_MOVE = [[-1, -1]] * 3
+
+# moves of a batch as arrays: all boards concatenated, with the offset, size and columns of every board
+Moves = namedtuple('Moves', 'players boards offsets sizes columns coordinates')
+
+
+def encode_move(board, indices, player, binary=False):
+    ''' Record of a proposed set on a board (Board class), e.g. indices [(1, 2), (1, 0), (0, 0)]
+    as entered in the game, as a JSON line or a binary record (see MOVE).
+    '''
+    card_numbers = [card.id for card in board.cards_on_board]
+    if binary:
+        return (MOVE.pack(player, board.rows, board.columns, len(card_numbers)) + bytes(card_numbers)
+                + bytes([i for index in indices for i in index]))
+    return json.dumps({'player': player, 'rows': board.rows, 'columns': board.columns,
+                       'board': card_numbers, 'move': [list(index) for index in indices]}) + '\n'
+
+
+def read_chunks(file, batch_size=65536, binary=False):
+    ''' Lazily read a move log in chunks of batch_size raw records: lines of a JSON lines log or
+    records of a binary log (see MOVE), from a binary file object.
+
+    Yields:
+        list of raw records (bytes)
+    '''
+    while True:
+        if not binary:
+            chunk = [line for line in (file.readline() for _ in range(batch_size)) if line.strip()]
+        else:
+            chunk = []
+            while len(chunk) < batch_size:
+                header = file.read(MOVE.size)
+                if len(header) < MOVE.size:
+                    break
+                payload = file.read(header[-1] + 6)
+                if len(payload) < header[-1] + 6:
+                    break
+                chunk.append(header + payload)
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_chunk(chunk, binary=False):
+    ''' Parse raw records into arrays (Moves namedtuple), see parse_binary and parse_jsonl. '''
+    return parse_binary(chunk) if binary else parse_jsonl(chunk)
+
+
+def valid_board(board):
+    ''' Whether a parsed JSON board is a list of distinct card numbers. '''
+    return (isinstance(board, list) and all([type(card_number) is int and 0 <= card_number < NUMBER_OF_PLAYABLE_CARDS
+                                             for card_number in board]) and len(set(board)) == len(board))
+
+
+def parse_binary(chunk):
+    ''' Parse binary records (see MOVE) in a single NumPy pass over the concatenated records.
+    Moves on boards with cards that are not card numbers or not distinct get negative
+    coordinates, which makes them invalid input.
+    '''
+    data = np.frombuffer(b''.join(chunk), dtype=np.uint8).astype(np.int64)
+    starts = np.cumsum([0] + [len(record) for record in chunk[:-1]], dtype=np.int64)
+    players = data[starts] | data[starts + 1] << 8
+    sizes = data[starts + 4]
+
+    # cards of every board follow its header, the coordinates follow the cards
+    offsets = np.cumsum(sizes) - sizes
+    boards = data[np.repeat(starts + MOVE.size - offsets, sizes) + np.arange(sizes.sum())]
+    coordinates = data[(starts + MOVE.size + sizes)[:, None] + np.arange(6)]
+
+    # boards with a card out of range or a card twice, found among the cards sorted per move
+    moves = np.repeat(np.arange(len(chunk)), sizes)
+    order = np.lexsort((boards, moves))
+    repeated = (moves[order][1:] == moves[order][:-1]) & (boards[order][1:] == boards[order][:-1])
+    invalid = np.zeros(len(chunk), dtype=bool)
+    invalid[moves[boards >= NUMBER_OF_PLAYABLE_CARDS]] = True
+    invalid[moves[order][1:][repeated]] = True
+    coordinates[invalid] = -1
+    return Moves(players.tolist(), boards, offsets, sizes, data[starts + 3], coordinates.reshape(-1, 3, 2))
+
+
+def parse_jsonl(chunk):
+    ''' Parse JSON lines; moves that cannot be parsed or whose board is not a list of distinct card
+    numbers (see valid_board) get negative coordinates, which makes them invalid input.
+    '''
+    players, boards, offsets, sizes, columns, coordinates = [], [], [], [], [], []
+    for line in chunk:
+        try:
+            record = json.loads(line)
+            player, n_columns, board = record['player'], int(record['columns']), record['board']
+            move = record['move']
+            if len(move) != 3 or not all([len(index) == 2 for index in move]):
+                raise ValueError(move)
+            if not isinstance(player, (str, int)):
+                player = json.dumps(player)
+        except (ValueError, TypeError, KeyError):
+            player, n_columns, board, move = None, 1, [], INVALID_MOVE
+        if not valid_board(board):
+            board, move = [], INVALID_MOVE
+        players.append(player)
+        offsets.append(len(boards))
+        boards.extend(board)
+        sizes.append(len(board))
+        columns.append(n_columns)
+        coordinates.append(move)
+
+    try:
+        array = np.array(coordinates)
+    except (ValueError, TypeError):
+        array = None
+    if array is None or array.dtype.kind not in 'iu':
+        # some coordinates are not integers: mark those moves as invalid input
+        array = np.array([move if all([isinstance(i, int) for index in move for i in index]) else INVALID_MOVE
+                          for move in coordinates])
+    coordinates = array.astype(np.int64).reshape(-1, 3, 2)
+    return Moves(players, np.array(boards, dtype=np.int64), np.array(offsets, dtype=np.int64),
+                 np.array(sizes, dtype=np.int64), np.array(columns, dtype=np.int64), coordinates)
+
+
+def validate_moves(moves):
+    ''' Validate a batch of moves against their reconstructed boards in a single NumPy pass.
+
+    A move is valid input if its three coordinates are on the board and point at three distinct
+    cards (as the game accepts them), and a valid set if those cards form a set.
+
+    Returns:
+        (N,) array of verdict codes (VALID, INVALID_SET or INVALID_INPUT)
+    '''
+    x, y = moves.coordinates[..., 0], moves.coordinates[..., 1]
+    positions = flattened_index(x, y, moves.columns[:, None])
+    on_board = np.all((x >= 0) & (y >= 0) & (y < moves.columns[:, None]) & (positions < moves.sizes[:, None]), axis=1)
+    distinct = ((positions[:, 0] != positions[:, 1]) & (positions[:, 0] != positions[:, 2])
+                & (positions[:, 1] != positions[:, 2]))
+    valid_input = on_board & distinct
+
+    cards = np.zeros(positions.shape, dtype=np.int64)
+    if len(moves.boards):
+        cards = moves.boards[np.where(valid_input[:, None], moves.offsets[:, None] + positions, 0)]
+    valid_set = STANDARD.validate(cards) if len(cards) else np.zeros(0, dtype=bool)
+    return np.where(valid_input, np.where(valid_set, VALID, INVALID_SET), INVALID_INPUT)
+
+
+def validate_chunk(chunk, binary=False):
+    ''' Parse and validate a chunk of raw records, see read_chunks.
+
+    Returns:
+        players: list of the player of every move
+        verdicts: (N,) array of verdict codes
+    '''
+    moves = parse_chunk(chunk, binary)
+    return moves.players, validate_moves(moves)
+
+
+def validate_log(file, verdicts_file=None, binary=False, batch_size=65536, workers=1):
+    ''' Validate a move log, streaming it in batches so memory only depends on the batch size.
+
+    With more than one worker, batches are validated in a ProcessPoolExecutor with a bounded
+    number in flight, and their verdicts are written in the order of the log.
+
+    Args:
+        file: binary file object of the move log
+        verdicts_file: text file object for a JSON line per move, or None
+        binary: bool indicating whether the log has binary records instead of JSON lines
+        batch_size: number of moves per batch
+        workers: number of processes
+    Returns:
+        dictionary with the number of moves per verdict per player
+    '''
+    totals = Counter()
+    move = 0
+    # JSON of every player, encoded once
+    encoded = {}
+
+    def collect(players, verdicts):
+        nonlocal move
+        verdicts = verdicts.tolist()
+        totals.update(zip(players, verdicts))
+        if verdicts_file is not None:
+            for player in set(players).difference(encoded):
+                encoded[player] = json.dumps(player)
+            verdicts_file.write(''.join([
+                f'{{"move": {move + i}, "player": {encoded[player]}, "verdict": "{VERDICTS[verdict]}"}}\n'
+                for i, (player, verdict) in enumerate(zip(players, verdicts))]))
+        move += len(players)
+
+    chunks = read_chunks(file, batch_size, binary)
+    for players, verdicts in bounded_map(validate_chunk, ((chunk, binary) for chunk in chunks), workers, ordered=True):
+        collect(players, verdicts)
+
+    players = defaultdict(lambda: dict.fromkeys(VERDICTS, 0))
+    for (player, verdict), count in totals.items():
+        players[str(player)][VERDICTS[verdict]] += count
+    return dict(sorted(players.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Validate a log of proposed sets and score every player.')
+    parser.add_argument('log', help='move log, - for standard input.')
+    parser.add_argument('--binary', action='store_true', help='the log has binary records instead of JSON lines.')
+    parser.add_argument('--verdicts', default=None, help='file for a JSON line with the verdict of every move.')
+    parser.add_argument('--batch-size', type=int, default=65536)
+    parser.add_argument('--workers', type=int, default=1)
+    args = parser.parse_args()
+
+    log = sys.stdin.buffer if args.log == '-' else open(args.log, 'rb')
+    verdicts = None if args.verdicts is None else open(args.verdicts, 'w')
+    try:
+        print(json.dumps(validate_log(log, verdicts, args.binary, args.batch_size, args.workers), indent=2))
+    finally:
+        log.close()
+        if verdicts is not None:
+            verdicts.close()
@@ -0,0 +1,218 @@
+import itertools
+
+import numpy as np
+
+from attribute import Attribute, CARD_ATTRIBUTES
+from deck import Deck
+
+
+class VariantCard:
+    ''' Card of a variant: its card number and option indices, e.g. on a Board of the variant.
+    Unlike Card instances (standard deck only) cards are created when drawn, and have no glyphs.
+    '''
+    __slots__ = ('variant', 'id', 'indices')
+
+    def __init__(self, variant, card_number):
+        self.variant = variant
+        self.id = int(card_number)
+        self.indices = tuple(variant.decode(self.id).tolist())
+
+    @property
+    def values(self):
+        ''' Mapping of attribute name to option, e.g. {'attribute0': '2', ...}. '''
+        return {attribute.name: attribute.options[index]
+                for attribute, index in zip(self.variant.attributes, self.indices)}
+
+    def get_card(self):
+        ''' Return card representation: the options of its attributes, e.g. 0-2-1-0-1. '''
+        return '-'.join([attribute.options[index] for attribute, index in zip(self.variant.attributes, self.indices)])
+
+    def __eq__(self, other):
+        return isinstance(other, VariantCard) and self.variant is other.variant and self.id == other.id
+
+    def __hash__(self):
+        return self.id
+
+    def __repr__(self):
+        return self.get_card()
+
+
+class Variant:
+    def __init__(self, attributes):
+        ''' Variant class
+        Rules of a deck with any number of attributes that all have the same number of options K.
+        A set consists of K cards for which every attribute is all the same or all different;
+        the standard game has four attributes with three options.
+
+        Cards are packed integers: the card number is the base-K number of its option indices
+        (first attribute most significant, like CARD_MATRIX), so a card takes a single integer
+        whatever the number of attributes, and all rules work on arrays of card numbers.
+
+        Args:
+            attributes: list of Attribute instances, e.g. list(CARD_ATTRIBUTES.values())
+        '''
+        self.attributes = list(attributes)
+        self.options = self.attributes[0].num_options
+        assert all([attribute.num_options == self.options for attribute in self.attributes])
+        assert self.options >= 3
+
+        self.n_attributes = len(self.attributes)
+        self.set_size = self.options
+        self.size = self.options ** self.n_attributes
+        self.place_values = self.options ** np.arange(self.n_attributes - 1, -1, -1, dtype=np.int64)
+
+    @classmethod
+    def generate(cls, n_attributes, n_options):
+        ''' Variant with generated attributes, e.g. generate(6, 4) for six attributes with four options. '''
+        width = len(str(n_options - 1))
+        return cls([Attribute(f'attribute{i}', [str(option).zfill(width) for option in range(n_options)])
+                    for i in range(n_attributes)])
+
+    def encode(self, indices):
+        ''' Convert option indices (..., n_attributes) to card numbers (...). '''
+        return np.asarray(indices, dtype=np.int64) @ self.place_values
+
+    def decode(self, numbers):
+        ''' Convert card numbers (...) to option indices (..., n_attributes). '''
+        return (np.asarray(numbers, dtype=np.int64)[..., None] // self.place_values) % self.options
+
+    def card(self, card_number):
+        ''' Card (VariantCard class) of a card number. '''
+        return VariantCard(self, card_number)
+
+    def deck(self, seed=None):
+        ''' Shuffled deck (Deck class) of all card numbers of this variant. '''
+        return Deck(seed, size=self.size)
+
+    def validate(self, sets, return_mask=False):
+        ''' Checks many sets for validity in a single NumPy pass.
+
+        Args:
+            sets: (N, K) array of card numbers or (N, K, n_attributes) array of option indices
+            return_mask: bool indicating whether to also return the per-attribute failure mask
+        Returns:
+            valid: (N,) boolean array indicating which sets are valid
+            invalid_attributes: (N, n_attributes) boolean array, only returned if return_mask
+        '''
+        sets = np.asarray(sets, dtype=np.int64)
+        if sets.ndim == 2:
+            sets = self.decode(sets)
+        assert sets.shape[1] == self.set_size
+
+        values = np.sort(sets, axis=1)
+        all_same = values[:, 0] == values[:, -1]
+        all_different = np.all(np.diff(values, axis=1) != 0, axis=1)
+        invalid_attributes = ~(all_same | all_different)
+        valid = ~invalid_attributes.any(axis=1)
+        return (valid, invalid_attributes) if return_mask else valid
+
+    def complete(self, cards):
+        ''' Card numbers that complete K - 1 card numbers (..., K - 1) into a set, -1 if none does. '''
+        completion, valid = self.complete_indices(self.decode(cards))
+        return np.where(valid, self.encode(completion), -1)
+
+    def complete_indices(self, indices):
+        ''' Option indices that complete K - 1 cards (..., K - 1, n_attributes) into a set.
+
+        Per attribute the K - 1 values must be all the same (completed by the same value) or all
+        different (completed by the single missing value).
+
+        Returns:
+            completion: (..., n_attributes) option indices of the completing card
+            valid: (...) boolean array indicating whether a completing card exists
+        '''
+        # with three options the completing value v of a and b is the solution of a + b + v = 0 (mod 3)
+        if self.options == 3:
+            return -indices.sum(axis=-2) % 3, np.ones(indices.shape[:-2], dtype=bool)
+
+        values = np.sort(indices, axis=-2)
+        all_same = values[..., 0, :] == values[..., -1, :]
+        all_different = np.all(np.diff(values, axis=-2) != 0, axis=-2)
+        missing = self.options * (self.options - 1) // 2 - values.sum(axis=-2)
+
+        valid = np.all(all_same | all_different, axis=-1)
+        completion = np.where(all_same, values[..., 0, :], missing)
+        return np.where(valid[..., None], completion, 0), valid
+
+    def iter_sets(self, numbers, chunk_size=1 << 20):
+        ''' Lazily find the sets among distinct card numbers.
+
+        Every combination of K - 1 cards is completed to its unique K-th card, which is looked up
+        in the sorted card numbers; a set is only reported from its K - 1 lowest positions so each
+        set is found once. The last two positions are vectorised in chunks of about chunk_size
+        combinations, so memory stays bounded for any number of cards.
+
+        Yields:
+            (m, K) arrays of positions into numbers, increasing within every row
+        '''
+        numbers = np.asarray(numbers, dtype=np.int64)
+        n = len(numbers)
+        indices = self.decode(numbers).astype(np.int8)
+        order = np.argsort(numbers)
+        sorted_numbers = numbers[order]
+
+        # position lookup: a table over all card numbers if that is at most a few MB or small
+        # compared to the cards, otherwise a binary search in the sorted card numbers
+        if self.size <= max(64 * n, 1 << 20):
+            table = np.full(self.size, -1, dtype=np.int32)
+            table[numbers] = np.arange(n)
+        else:
+            table = None
+
+        def position(card_numbers):
+            ''' Position of card numbers in numbers, -1 if not present. '''
+            if table is not None:
+                return table[card_numbers]
+            index = np.minimum(np.searchsorted(sorted_numbers, card_numbers), max(n - 1, 0))
+            return np.where(sorted_numbers[index] == card_numbers, order[index], -1)
+
+        for prefix in itertools.combinations(range(n), self.set_size - 3):
+            start = prefix[-1] + 1 if prefix else 0
+            rows = max(1, chunk_size // max(n, 1))
+            for row in range(start, n, rows):
+                first, second = np.nonzero(np.arange(n) > np.arange(row, min(row + rows, n))[:, None])
+                first += row
+                if len(first) == 0:
+                    continue
+
+                if self.options == 3:
+                    # pairs only, completed without stacking the indices of both cards
+                    positions = np.column_stack([first, second])
+                    last = position(self.encode(-(indices[first] + indices[second]) % 3))
+                else:
+                    prefixes = np.broadcast_to(np.array(prefix, dtype=np.int64), (len(first), len(prefix)))
+                    positions = np.column_stack([prefixes, first, second])
+                    completion, valid = self.complete_indices(indices[positions])
+                    last = np.where(valid, position(self.encode(completion)), -1)
+                found = last > second
+                yield np.column_stack([positions[found], last[found]])
+
+    def find_sets(self, numbers):
+        ''' Find the sets among distinct card numbers, see iter_sets.
+
+        Returns:
+            (n_sets, K) array of positions into numbers
+        '''
+        return np.concatenate([np.empty((0, self.set_size), dtype=np.int64), *self.iter_sets(numbers)])
+
+    def count_sets(self, numbers, chunk_size=1 << 20):
+        ''' Count the sets among distinct card numbers without materialising them.
+
+        With three options a set is a solution of a + b + c = 0 (mod 3) per attribute, so for large
+        collections the sets are counted with a Fourier transform over the whole card space
+        instead of completing every pair.
+        '''
+        numbers = np.asarray(numbers, dtype=np.int64)
+        n = len(numbers)
+        if self.options == 3 and n * (n - 1) // 2 > self.size * self.n_attributes and self.size <= 3 ** 14:
+            indicator = np.zeros(self.size)
+            indicator[numbers] = 1
+            transform = np.fft.fftn(indicator.reshape([3] * self.n_attributes))
+            solutions = int(round(np.sum(transform ** 3).real / self.size))
+            # solutions are ordered triples of cards, including the n triples of a single card
+            return (solutions - n) // 6
+        return sum([len(sets) for sets in self.iter_sets(numbers, chunk_size)])
+
+
+# the standard game
+STANDARD = Variant(CARD_ATTRIBUTES.values())